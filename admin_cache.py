@@ -0,0 +1,102 @@
+"""
+Кэш списков администраторов чатов с TTL и вытеснением LRU
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from telegram import ChatMember
+from telegram.ext import ChatMemberHandler
+
+from config import ADMIN_CACHE_TTL, ADMIN_CACHE_SIZE, ADMIN_CACHE_CHAT_MEMBER
+from metrics import ADMINS_SECONDS
+
+ADMIN_STATUSES = frozenset({ChatMember.ADMINISTRATOR, ChatMember.OWNER})
+# Обновления для сброса кэша: chat_member приходит на каждый вход/выход участника и запрашивается только по настройке
+ADMIN_CHAT_MEMBER_TYPES = ChatMemberHandler.ANY_CHAT_MEMBER if ADMIN_CACHE_CHAT_MEMBER else ChatMemberHandler.MY_CHAT_MEMBER
+
+
+class AdminCache:
+    """
+    Хранит результат get_administrators() для каждого чата не дольше ttl секунд и не более
+    max_size чатов. Запись чата сбрасывается, когда my_chat_member (и chat_member при
+    ADMIN_CACHE_CHAT_MEMBER) сообщает о назначении, снятии или изменении прав администратора.
+    """
+
+    def __init__(self, ttl=ADMIN_CACHE_TTL, max_size=ADMIN_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # chat_id -> (истекает в, администраторы)
+        self._pending = {}             # chat_id -> задача текущего запроса get_administrators
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_administrators(self, chat):
+        """Возвращает администраторов чата из кэша или запрашивает их у Telegram"""
+        entry = self._entries.get(chat.id)
+        started = time.monotonic()
+        if entry is not None:
+            expires_at, admins = entry
+            if expires_at > started:
+                self._entries.move_to_end(chat.id)
+                self.hits += 1
+                ADMINS_SECONDS.observe(time.monotonic() - started, 'hit')
+                return admins
+            del self._entries[chat.id]
+        self.misses += 1
+
+        # Одновременные промахи по одному чату ждут один и тот же запрос
+        pending = self._pending.get(chat.id)
+        if pending is not None:
+            admins = await pending
+            ADMINS_SECONDS.observe(time.monotonic() - started, 'shared')
+            return admins
+        pending = asyncio.ensure_future(chat.get_administrators())
+        self._pending[chat.id] = pending
+        try:
+            admins = await pending
+        finally:
+            # Если чат сбросили во время запроса, результат может быть устаревшим
+            fresh = self._pending.get(chat.id) is pending
+            if fresh:
+                del self._pending[chat.id]
+        if fresh:
+            self._store(chat.id, admins)
+        ADMINS_SECONDS.observe(time.monotonic() - started, 'miss')
+        return admins
+
+    def _store(self, chat_id, admins):
+        self._entries[chat_id] = (time.monotonic() + self.ttl, admins)
+        self._entries.move_to_end(chat_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, chat_id):
+        """Сбрасывает кэш администраторов чата"""
+        if self._entries.pop(chat_id, None) is not None or self._pending.pop(chat_id, None) is not None:
+            self.invalidations += 1
+
+    async def handle_chat_member_update(self, update, context):
+        """Обработчик chat_member / my_chat_member: сбрасывает кэш при изменениях среди администраторов"""
+        member_update = update.chat_member or update.my_chat_member
+        if member_update is None:
+            return
+        if (member_update.old_chat_member.status in ADMIN_STATUSES
+                or member_update.new_chat_member.status in ADMIN_STATUSES):
+            self.invalidate(member_update.chat.id)
+
+    def stats(self) -> dict:
+        """Счетчики кэша"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -2,49 +2,80 @@ import logging
 import json
 import asyncio
 from datetime import datetime, timedelta
+from functools import partial
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, MessageHandler, CommandHandler, CallbackQueryHandler, filters, ContextTypes
-from config import BOT_TOKEN, SYSTEM_MESSAGE_TYPES
+from telegram.ext import CommandHandler, CallbackQueryHandler, filters, ContextTypes
+from config import BOT_OWNERS
+from classifier import MessageClassifier, POLICIES, POLICY_DEFAULT, POLICY_STRICT, POLICY_SAFE
+from base_bot import BaseCleanerBot
+from http_pool import pool_stats
+from logging_setup import setup_logging, dropped_records
+from update_processor import ChatOrderedProcessor
+from bot_state import PersistentState
+from audit_log import AuditLog, TYPES, OUTCOME_DELETED, OUTCOME_FAILED, format_record
+from window_stats import DeletionWindows
+from chat_settings import ChatSettings, FLAGS, AUTO_DELETE, LOG_DELETIONS, NOTIFY_ADMINS, policy_of
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Настройка логирования (LOG_MODE, LOG_FORMAT)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-class AdvancedSystemMessageCleanerBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
-        self.stats = {
+SETTING_TITLES = {
+    'auto_delete': 'Автоудаление',
+    'log_deletions': 'Логирование в чат',
+    'notify_admins': 'Уведомления админов',
+}
+POLICY_TITLES = {
+    POLICY_DEFAULT: 'обычная',
+    POLICY_STRICT: 'строгая (сообщения пользователей не удаляются)',
+    POLICY_SAFE: 'безопасная (только системные атрибуты)',
+}
+
+class AdvancedSystemMessageCleanerBot(BaseCleanerBot):
+    MODE = 'advanced'
+    STARTUP_MESSAGE = "Запуск продвинутого бота для очистки системных сообщений..."
+    
+    def __init__(self, application=None):
+        # Политика классификатора выбирается по настройкам чата; фильтр PTB использует самую широкую (default)
+        self.classifiers = {policy: MessageClassifier(policy) for policy in POLICIES}
+        # Счетчики и настройки переживают перезапуск: запись в базу идет в фоне, а не на каждое удаление
+        self.state = PersistentState()
+        self.stats = self.state.bind('stats', {
             'messages_deleted': 0,
             'errors': 0,
             'start_time': datetime.now()
-        }
-        self.settings = {
+        })
+        self.settings = self.state.bind('settings', {
             'auto_delete': True,
             'log_deletions': False,  # По умолчанию отключено
             'notify_admins': True    # По умолчанию включено
-        }
-        self.setup_handlers()
+        })
+        # Настройки групп; self.settings - значения по умолчанию для чатов без своих настроек
+        self.chat_settings = ChatSettings(self.settings)
+        # Журнал удалений вместо сообщения в чат на каждое удаление (просмотр: /deleted или python audit_log.py)
+        self.audit = AuditLog()
+        # Удаления за минуту/час/сутки по типам и чатам для /stats
+        self.windows = DeletionWindows()
+        super().__init__(application)
     
-    def setup_handlers(self):
-        """Настройка обработчиков команд и сообщений"""
+    def setup_commands(self):
+        """Команды бота и inline кнопки"""
         # Основные команды
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        self.application.add_handler(CommandHandler("stats", self.stats_command))
-        self.application.add_handler(CommandHandler("settings", self.settings_command))
+        self.application.add_handler(CommandHandler("start", self.start_command, filters=filters.UpdateType.MESSAGE))
+        self.application.add_handler(CommandHandler("help", self.help_command, filters=filters.UpdateType.MESSAGE))
+        self.application.add_handler(CommandHandler("status", self.status_command, filters=filters.UpdateType.MESSAGE))
+        self.application.add_handler(CommandHandler("stats", self.stats_command, filters=filters.UpdateType.MESSAGE))
+        self.application.add_handler(CommandHandler("settings", self.settings_command, filters=filters.UpdateType.MESSAGE))
+        self.application.add_handler(CommandHandler("deleted", self.deleted_command, filters=filters.UpdateType.MESSAGE))
         
         # Обработчик inline кнопок
         self.application.add_handler(CallbackQueryHandler(self.button_callback))
-        
-        # Обработчик всех сообщений
-        self.application.add_handler(MessageHandler(filters.ALL, self.handle_message))
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        # /start в личном чате открывает боту личные сообщения пользователя
+        if update.effective_chat.type == 'private':
+            self.unreachable.clear(update.effective_user.id)
         keyboard = [
             [InlineKeyboardButton("📊 Статистика", callback_data='stats')],
             [InlineKeyboardButton("⚙️ Настройки", callback_data='settings')],
@@ -79,11 +110,13 @@ class AdvancedSystemMessageCleanerBot:
 /status - статус бота в чате
 /stats - статистика работы
 /settings - настройки бота
+/deleted [тип] [число] - последние удаления в чате (для администраторов)
 
-**Настройки:**
+**Настройки** (в группе - для этого чата, меняют администраторы; в личном чате - по умолчанию):
 • auto_delete - автоматическое удаление
 • log_deletions - логирование удалений в чат
 • notify_admins - уведомления админов в личные сообщения
+• политика - какие сообщения считаются системными (только в группе)
 
 **Требования для работы:**
 • Права администратора
@@ -131,6 +164,20 @@ class AdvancedSystemMessageCleanerBot:
     async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /stats"""
         uptime = datetime.now() - self.stats['start_time']
+        admin_cache = self.admin_cache.stats()
+        unreachable = self.unreachable.stats()
+        deletion = self.deleter.stats()
+        retry = self.retry_queue.stats()
+        permissions = self.permissions.stats()
+        catchup = self.catchup.stats()
+        pools = pool_stats(self.application)
+        processor = self.application.update_processor
+        settings, policy = self.current_settings(update.effective_chat)
+        chat_settings = self.chat_settings.stats()
+        chat = update.effective_chat
+        windows = self.format_windows("За минуту / час / сутки", self.windows.summary())
+        if chat.type != 'private':
+            windows += "\n" + self.format_windows("Этот чат за минуту / час / сутки", self.windows.summary(chat.id))
         hours, remainder = divmod(uptime.seconds, 3600)
         minutes, seconds = divmod(remainder, 60)
         
@@ -141,49 +188,150 @@ class AdvancedSystemMessageCleanerBot:
 **Удалено сообщений:** {self.stats['messages_deleted']}
 **Ошибок:** {self.stats['errors']}
 **Эффективность:** {self.stats['messages_deleted'] / max(1, self.stats['messages_deleted'] + self.stats['errors']) * 100:.1f}%
+{windows}
 
 **Настройки:**
-• Автоудаление: {'✅' if self.settings['auto_delete'] else '❌'}
-• Логирование в чат: {'✅' if self.settings['log_deletions'] else '❌'}
-• Уведомления админов: {'✅' if self.settings['notify_admins'] else '❌'}
+• Автоудаление: {'✅' if settings['auto_delete'] else '❌'}
+• Логирование в чат: {'✅' if settings['log_deletions'] else '❌'}
+• Уведомления админов: {'✅' if settings['notify_admins'] else '❌'}
+• Политика: {POLICY_TITLES[policy]}
+• Чатов со своими настройками: {chat_settings['customized']} (в памяти: {chat_settings['cached']})
+
+**Кэш администраторов:**
+• Чатов в кэше: {admin_cache['size']}
+• Попаданий: {admin_cache['hits']} ({admin_cache['hit_rate'] * 100:.1f}%)
+• Промахов: {admin_cache['misses']}
+
+**Пакетное удаление:**
+• Вызовов API на удаление: {deletion['api_calls']} (сэкономлено {deletion['saved_calls']})
+• Пакетов deleteMessages: {deletion['batches']}, повторов по одному: {deletion['fallbacks']}, удалено без подтверждения: {deletion['unconfirmed']}
+• Очередь повторов: {retry['queue_depth']}, повторов: {retry['retries']}, окончательных отказов: {retry['permanent_failures']}
+• Пропущено в чатах без прав: {permissions['skipped']} (проверок прав: {permissions['lookups']}, подавлено уведомлений: {permissions['suppressed_notices']})
+• Разборов очереди после простоя: {catchup['drains']} ({catchup['drained']} сообщений)
+
+**Личные уведомления:**
+• Недоступных администраторов: {unreachable['unreachable']}
+• Пропущено отправок: {unreachable['skipped']}
+• Отброшено строк логов при переполнении очереди: {dropped_records()}
+{self.format_processor(processor)}{self.format_pools(pools)}
         """
-        await update.message.reply_text(stats_text, parse_mode='Markdown')
+        await update.effective_message.reply_text(stats_text, parse_mode='Markdown')
+    
+    @staticmethod
+    def format_windows(title, summary, top=5):
+        """Раздел /stats со скользящими окнами: всего и самые частые типы за сутки"""
+        minute, hour, day = summary['total']
+        lines = [f"\n**{title}:**", f"• Удалено: {minute} / {hour} / {day}"]
+        for message_type, (minute, hour, day) in summary['types'][:top]:
+            # Подчеркивания в названиях типов в Markdown начинают курсив
+            name = message_type.replace('_', '\\_')
+            lines.append(f"• {name}: {minute} / {hour} / {day}")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def format_processor(processor):
+        """Раздел /stats о параллельной обработке обновлений"""
+        if not isinstance(processor, ChatOrderedProcessor):
+            return ""
+        stats = processor.stats()
+        return (f"\n**Обработка обновлений:**\n"
+                f"• Одновременно: {stats['active']}/{stats['max_concurrent']} (пик {stats['peak_active']})\n"
+                f"• Очередь: {stats['queue_depth']} (пик {stats['peak_queue_depth']}), ждут свой чат: {stats['waiting_chat']}\n"
+                f"• Обработано: {stats['processed']}")
+    
+    @staticmethod
+    def format_pools(pools):
+        """Раздел /stats о загрузке пулов HTTP соединений"""
+        if not pools:
+            return ""
+        lines = ["**HTTP пулы Bot API:**"]
+        for name, pool in pools.items():
+            title = "getUpdates" if name == 'get_updates' else "исходящие"
+            lines.append(f"• {title}: {pool['in_flight']}/{pool['pool_size']} занято, пик {pool['peak']}, "
+                         f"загрузка {pool['utilization'] * 100:.0f}%, ожиданий {pool['waits']}, "
+                         f"таймаутов пула {pool['pool_timeouts']}")
+        return "\n" + "\n".join(lines)
+    
+    def current_settings(self, chat):
+        """Настройки для показа и изменения: своей группы или значения по умолчанию (в личном чате)"""
+        if chat.type == 'private':
+            return dict(self.settings), POLICY_DEFAULT
+        flags = self.chat_settings.flags(chat.id)
+        return {name: bool(flags & bit) for name, bit in FLAGS.items()}, policy_of(flags)
     
     async def settings_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /settings"""
+        chat = update.effective_chat
+        settings, policy = self.current_settings(chat)
         keyboard = [
             [
                 InlineKeyboardButton(
-                    f"{'✅' if self.settings['auto_delete'] else '❌'} Автоудаление", 
-                    callback_data='toggle_auto_delete'
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    f"{'✅' if self.settings['log_deletions'] else '❌'} Логирование в чат", 
-                    callback_data='toggle_log_deletions'
+                    f"{'✅' if settings[name] else '❌'} {title}", 
+                    callback_data=f'toggle_{name}'
                 )
-            ],
-            [
-                InlineKeyboardButton(
-                    f"{'✅' if self.settings['notify_admins'] else '❌'} Уведомления админов", 
-                    callback_data='toggle_notify_admins'
-                )
-            ],
-            [InlineKeyboardButton("🔄 Сбросить статистику", callback_data='reset_stats')]
+            ]
+            for name, title in SETTING_TITLES.items()
         ]
+        if chat.type != 'private':
+            keyboard.append([InlineKeyboardButton(f"🔍 Политика: {POLICY_TITLES[policy]}", callback_data='cycle_policy')])
+        keyboard.append([InlineKeyboardButton("🔄 Сбросить статистику", callback_data='reset_stats')])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        settings_text = """
-⚙️ **Настройки бота**
+        scope = "этого чата" if chat.type != 'private' else "по умолчанию (для чатов без своих настроек)"
+        settings_text = f"""
+⚙️ **Настройки бота {scope}**
 
 Выберите параметр для изменения:
         """
-        await update.message.reply_text(settings_text, parse_mode='Markdown', reply_markup=reply_markup)
+        await update.effective_message.reply_text(settings_text, parse_mode='Markdown', reply_markup=reply_markup)
+    
+    async def is_chat_admin(self, chat, user_id) -> bool:
+        admins = await self.admin_cache.get_administrators(chat)
+        return any(admin.user.id == user_id for admin in admins)
+    
+    async def deleted_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /deleted [тип] [число]: последние удаления в чате из журнала"""
+        chat = update.effective_chat
+        if chat.type == 'private':
+            await update.message.reply_text("Команда работает в группе: /deleted [тип] [число]")
+            return
+        if not await self.is_chat_admin(chat, update.effective_user.id):
+            await update.message.reply_text("❌ Журнал удалений доступен только администраторам")
+            return
+        message_type = None
+        limit = 20
+        for arg in context.args:
+            if arg.isdigit():
+                limit = min(100, int(arg))
+            elif arg in TYPES:
+                message_type = arg
+        records = self.audit.records(chat.id, message_type, limit)
+        if not records:
+            await update.message.reply_text("Журнал удалений этого чата пуст")
+            return
+        summary = ", ".join(f"{name}: {count}" for name, count in self.audit.summary(chat.id).most_common())
+        lines = [format_record(record, with_chat=False) for record in records]
+        await update.message.reply_text(f"🗑️ Последние удаления ({len(records)}):\n" + "\n".join(lines)
+                                        + f"\n\nВсего в журнале по типам: {summary}")
     
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик нажатий на inline кнопки"""
         query = update.callback_query
+        chat = update.effective_chat
+        
+        # Настройки группы меняют только ее администраторы; настройки по умолчанию (личный чат)
+        # действуют во всех группах без своих настроек, поэтому их, как и общую статистику, меняют владельцы
+        if query.data.startswith('toggle_') or query.data == 'cycle_policy':
+            if chat.type != 'private':
+                if not await self.is_chat_admin(chat, query.from_user.id):
+                    await query.answer("Настройки чата могут менять только администраторы", show_alert=True)
+                    return
+            elif query.from_user.id not in BOT_OWNERS:
+                await query.answer("Настройки по умолчанию может менять только владелец бота", show_alert=True)
+                return
+        if query.data == 'reset_stats' and query.from_user.id not in BOT_OWNERS:
+            await query.answer("Статистику может сбросить только владелец бота", show_alert=True)
+            return
         await query.answer()
         
         if query.data == 'stats':
@@ -192,150 +340,73 @@ class AdvancedSystemMessageCleanerBot:
             await self.settings_command(update, context)
         elif query.data == 'help':
             await self.help_command(update, context)
-        elif query.data == 'toggle_auto_delete':
-            self.settings['auto_delete'] = not self.settings['auto_delete']
-            await query.edit_message_text("✅ Настройка 'Автоудаление' изменена!")
-        elif query.data == 'toggle_log_deletions':
-            self.settings['log_deletions'] = not self.settings['log_deletions']
-            await query.edit_message_text("✅ Настройка 'Логирование в чат' изменена!")
-        elif query.data == 'toggle_notify_admins':
-            self.settings['notify_admins'] = not self.settings['notify_admins']
-            await query.edit_message_text("✅ Настройка 'Уведомления админов' изменена!")
+        elif query.data.startswith('toggle_') and query.data[len('toggle_'):] in SETTING_TITLES:
+            name = query.data[len('toggle_'):]
+            if chat.type == 'private':
+                self.settings[name] = not self.settings[name]
+                # Изменения настроек редки: сохраняем сразу, не дожидаясь фоновой записи
+                self.state.flush()
+            else:
+                self.chat_settings.toggle(chat.id, name)
+            await query.edit_message_text(f"✅ Настройка '{SETTING_TITLES[name]}' изменена!")
+        elif query.data == 'cycle_policy' and chat.type != 'private':
+            policy = self.chat_settings.cycle_policy(chat.id)
+            await query.edit_message_text(f"✅ Политика удаления: {POLICY_TITLES[policy]}")
         elif query.data == 'reset_stats':
             self.stats['messages_deleted'] = 0
             self.stats['errors'] = 0
             await query.edit_message_text("✅ Статистика сброшена!")
     
+    def classify(self, message, bot_id=None):
+        """Классификация сообщения по политике его чата"""
+        return self.classifiers[policy_of(self.chat_settings.flags(message.chat.id))].classify(message, bot_id)
+    
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик всех сообщений для удаления системных"""
-        if not self.settings['auto_delete']:
-            return
-            
-        message = update.message
-        
-        # Проверяем, является ли сообщение системным
-        if self.is_system_message(message):
-            try:
-                # Удаляем системное сообщение
-                await message.delete()
-                self.stats['messages_deleted'] += 1
-                
-                logger.info(f"Удалено системное сообщение типа {self.get_message_type(message)} в чате {message.chat.id}")
-                
-                # Логирование в чат (если включено)
-                if self.settings['log_deletions'] and message.chat.type in ['group', 'supergroup']:
-                    log_message = f"🗑️ Удалено системное сообщение: {self.get_message_type(message)}"
-                    await context.bot.send_message(
-                        chat_id=message.chat.id,
-                        text=log_message,
-                        reply_to_message_id=None
-                    )
-                
-                # Уведомление администраторов в личные сообщения
-                if self.settings['notify_admins']:
-                    await self.notify_admins_privately(message, context)
-                    
-            except Exception as e:
-                self.stats['errors'] += 1
-                logger.error(f"Ошибка при удалении сообщения: {e}")
-                
-                # Уведомление об ошибке только администраторам
-                if self.settings['notify_admins']:
-                    try:
-                        await self.notify_admins_privately(message, context, error=True)
-                    except:
-                        pass
+        """Обработчик всех сообщений для удаления системных (если в чате включено автоудаление)"""
+        if self.chat_settings.flags(update.message.chat.id) & AUTO_DELETE:
+            await super().handle_message(update, context)
     
-    async def notify_admins_privately(self, message, context, error=False):
-        """Уведомляет администраторов в личные сообщения"""
-        try:
-            admins = await message.chat.get_administrators()
-            for admin in admins:
-                if admin.user.id != context.bot.id:  # Не уведомляем самого бота
-                    try:
-                        if error:
-                            notification_text = f"⚠️ Не удалось удалить системное сообщение в чате {message.chat.title}. Проверьте права бота."
-                        else:
-                            notification_text = f"🗑️ В чате {message.chat.title} удалено системное сообщение типа: {self.get_message_type(message)}"
-                        
-                        await context.bot.send_message(
-                            chat_id=admin.user.id,
-                            text=notification_text
-                        )
-                    except:
-                        pass  # Игнорируем ошибки отправки в личные сообщения
-        except Exception as e:
-            logger.error(f"Ошибка при уведомлении администраторов: {e}")
+    def notifications_enabled(self, chat_id) -> bool:
+        return bool(self.chat_settings.flags(chat_id) & NOTIFY_ADMINS)
     
-    def is_system_message(self, message) -> bool:
-        """Проверяет, является ли сообщение системным"""
-        # Проверяем, есть ли у сообщения системные атрибуты
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return True
-        
-        # Проверяем текст сообщения на системные уведомления
-        if message.text:
-            # Уведомления о добавлении участников
-            if any(keyword in message.text for keyword in [
-                'добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась',
-                'added', 'joined', 'присоединился к группе', 'присоединилась к группе'
-            ]):
-                return True
-            
-            # Уведомления о выходе участников
-            if any(keyword in message.text for keyword in [
-                'покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла',
-                'покинул группу', 'покинула группу', 'ушел из группы', 'ушла из группы'
-            ]):
-                return True
-            
-            # Уведомления об изменениях чата
-            if any(keyword in message.text for keyword in [
-                'изменил(а) название', 'изменил название', 'изменила название',
-                'изменил(а) фото', 'изменил фото', 'изменила фото',
-                'удалил(а) фото', 'удалил фото', 'удалила фото',
-                'закрепил(а)', 'закрепил', 'закрепила', 'pinned'
-            ]):
-                return True
-        
-        # Проверяем специальные случаи системных сообщений
-        # Системные сообщения обычно не имеют текста или имеют специальный формат
-        if message.text is None and not any([
-            message.photo, message.video, message.audio, message.document, 
-            message.voice, message.video_note, message.sticker, message.animation
-        ]):
-            # Если нет текста и нет медиа - это скорее всего системное сообщение
-            return True
-        
-        return False
+    def record(self, chat_id, message_id, message_type, outcome):
+        """Статистика, журнал удалений и окна /stats"""
+        self.audit.append(chat_id, message_id, message_type, outcome)
+        if outcome == OUTCOME_DELETED:
+            self.stats['messages_deleted'] += 1
+            self.windows.add(chat_id, message_type)
+        elif outcome == OUTCOME_FAILED:
+            self.stats['errors'] += 1
     
-    def get_message_type(self, message) -> str:
-        """Определяет тип системного сообщения"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return message_type
-        
-        # Определяем тип по содержимому
-        if message.text:
-            if any(keyword in message.text for keyword in ['добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась', 'added', 'joined']):
-                return 'new_chat_members'
-            elif any(keyword in message.text for keyword in ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']):
-                return 'left_chat_member'
-            elif any(keyword in message.text for keyword in ['название', 'title']):
-                return 'new_chat_title'
-            elif any(keyword in message.text for keyword in ['фото', 'photo']):
-                return 'new_chat_photo'
-            elif any(keyword in message.text for keyword in ['закрепил(а)', 'закрепил', 'закрепила', 'pinned']):
-                return 'pinned_message'
-        
-        return "unknown"
+    async def on_deleted(self, update, context, message_type):
+        """Логирование удаления в чат (если включено в настройках чата)"""
+        message = update.message
+        if (self.chat_settings.flags(message.chat.id) & LOG_DELETIONS and message.chat.type in ['group', 'supergroup']
+                and not self.catchup.is_backlog(message)):
+            log_message = f"🗑️ Удалено системное сообщение: {message_type}"
+            await self.background(self.outbound.submit(message.chat.id, partial(
+                context.bot.send_message,
+                chat_id=message.chat.id,
+                text=log_message,
+                reply_to_message_id=None
+            )), update)
+    
+    async def post_init(self, application):
+        """Возобновляет повторы удалений, оставшиеся с прошлого запуска, и запускает фоновую запись счетчиков"""
+        await super().post_init(application)
+        self.state.start()
+    
+    async def post_stop(self, application):
+        """Отправляет накопленные удаления, сводки и очередь исходящих вызовов и сохраняет состояние при остановке бота"""
+        await super().post_stop(application)
+        await self.state.close()
+        self.chat_settings.close()
+        self.audit.close()
     
     def run(self):
         """Запуск бота"""
-        logger.info("Запуск продвинутого бота для очистки системных сообщений...")
         logger.info(f"Настройки: {self.settings}")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+        super().run()
 
 if __name__ == "__main__":
     bot = AdvancedSystemMessageCleanerBot()
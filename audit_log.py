@@ -0,0 +1,150 @@
+"""
+Журнал удалений: записи фиксированного размера (чат, сообщение, тип, время, результат) в кольцевом
+буфере файла, отображенного в память (mmap). Размер файла постоянный, новая запись затирает самую
+старую; запись не выделяет память под строки и не делает системных вызовов записи.
+
+Просмотр: python audit_log.py [--chat ID] [--type new_chat_members] [--limit 50] [--summary]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import Counter
+from datetime import datetime
+
+from config import AUDIT_LOG_FILE, AUDIT_LOG_SIZE, SYSTEM_MESSAGE_TYPES
+
+# Заголовок: сигнатура, версия, размер записи, емкость (записей), всего добавлено записей
+_HEADER = struct.Struct('<4sHHIQ')
+_HEADER_SIZE = 32
+# Запись: chat_id, время (unix), message_id, код типа, код результата
+_RECORD = struct.Struct('<qdiHBx')
+_MAGIC = b'DLOG'
+_VERSION = 1
+_COUNT_OFFSET = 12
+
+# Коды типов: номер в списке SYSTEM_MESSAGE_TYPES (новые типы добавляются в конец списка), 0 - прочие
+TYPES = ('unknown',) + tuple(SYSTEM_MESSAGE_TYPES)
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+OUTCOME_DELETED = 1
+OUTCOME_FAILED = 2
+OUTCOME_NO_RIGHTS = 3
+OUTCOME_RETRY = 4
+OUTCOMES = {OUTCOME_DELETED: 'удалено', OUTCOME_FAILED: 'ошибка', OUTCOME_NO_RIGHTS: 'нет прав',
+            OUTCOME_RETRY: 'повтор'}
+
+
+class AuditLog:
+    def __init__(self, path=AUDIT_LOG_FILE, capacity=AUDIT_LOG_SIZE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self._file = open(path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.capacity = self._read_header()
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        size = _HEADER_SIZE + capacity * _RECORD.size
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self._file = open(path, 'r+b' if not fresh else 'w+b')
+        if fresh:
+            # Новый файл или другая емкость: старый журнал не переносится
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        if fresh or self._map[:4] != _MAGIC:
+            _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, _RECORD.size, capacity, 0)
+        self.capacity = self._read_header()
+
+    def _read_header(self) -> int:
+        magic, version, record_size, capacity, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+            raise ValueError(f"{self.path}: не журнал удалений или неподдерживаемая версия")
+        return capacity
+
+    @property
+    def count(self) -> int:
+        """Всего добавлено записей (в файле хранятся последние capacity)"""
+        return struct.unpack_from('<Q', self._map, _COUNT_OFFSET)[0]
+
+    def append(self, chat_id, message_id, message_type, outcome, timestamp=None):
+        count = self.count
+        _RECORD.pack_into(self._map, _HEADER_SIZE + count % self.capacity * _RECORD.size,
+                          chat_id, timestamp or time.time(), message_id, TYPE_CODES.get(message_type, 0), outcome)
+        # Счетчик обновляется после записи: читатель не увидит недописанную запись
+        struct.pack_into('<Q', self._map, _COUNT_OFFSET, count + 1)
+
+    def records(self, chat_id=None, message_type=None, limit=50):
+        """Последние записи (новые первыми) с фильтром по чату и типу"""
+        count = self.count
+        stored = min(count, self.capacity)
+        type_code = TYPE_CODES.get(message_type, 0) if message_type is not None else None
+        result = []
+        for index in range(count - 1, count - stored - 1, -1):
+            chat, timestamp, message_id, code, outcome = _RECORD.unpack_from(
+                self._map, _HEADER_SIZE + index % self.capacity * _RECORD.size)
+            if chat_id is not None and chat != chat_id:
+                continue
+            if type_code is not None and code != type_code:
+                continue
+            result.append((chat, message_id, TYPES[code] if code < len(TYPES) else 'unknown', timestamp, outcome))
+            if len(result) >= limit:
+                break
+        return result
+
+    def summary(self, chat_id=None) -> Counter:
+        """Число записей по типам (для всех хранимых записей или одного чата)"""
+        counts = Counter()
+        for chat, _, _, code, _ in self._iter_all():
+            if chat_id is None or chat == chat_id:
+                counts[TYPES[code] if code < len(TYPES) else 'unknown'] += 1
+        return counts
+
+    def _iter_all(self):
+        stored = min(self.count, self.capacity)
+        end = _HEADER_SIZE + stored * _RECORD.size
+        return _RECORD.iter_unpack(self._map[_HEADER_SIZE:end])
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            if not self.readonly:
+                self._map.flush()
+            self._map.close()
+        self._file.close()
+
+
+def format_record(record, with_chat=True) -> str:
+    chat_id, message_id, message_type, timestamp, outcome = record
+    moment = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    chat = f"  чат {chat_id}" if with_chat else ""
+    return f"{moment}{chat}  сообщение {message_id}  {message_type}  {OUTCOMES.get(outcome, outcome)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=AUDIT_LOG_FILE)
+    parser.add_argument('--chat', type=int, help="только этот чат")
+    parser.add_argument('--type', dest='message_type', choices=TYPES, help="только этот тип сообщений")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--summary', action='store_true', help="число записей по типам")
+    args = parser.parse_args()
+
+    log = AuditLog(args.file, readonly=True)
+    try:
+        if args.summary:
+            for message_type, count in log.summary(args.chat).most_common():
+                print(f"{count:8}  {message_type}")
+            return
+        for record in log.records(args.chat, args.message_type, args.limit):
+            print(format_record(record))
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
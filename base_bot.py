@@ -0,0 +1,237 @@
+"""
+Общая часть ботов очистки (bot.py, bot_safe.py, bot_strict.py, bot_web.py, advanced_bot.py):
+классификация, пакетное удаление с повторами, уведомления администраторов, запуск и остановка.
+Боты наследуют BaseCleanerBot и задают политику классификатора, метку режима и тексты команд.
+"""
+
+import asyncio
+import logging
+import time
+from telegram import Update
+from telegram.ext import MessageHandler, CommandHandler, ChatMemberHandler, filters, ContextTypes
+from config import FILTER_MODE, NOTIFY_MODE
+from classifier import MessageClassifier, POLICY_DEFAULT
+from admin_cache import AdminCache, ADMIN_CHAT_MEMBER_TYPES
+from permissions import BotPermissionCache
+from outbound import OutboundScheduler
+from deletion import DeletionBatcher
+from retry_queue import DeletionRetryQueue
+from notifications import NotificationDigest, KIND_DELETED, KIND_FAILED, KIND_UNCONFIRMED
+from unreachable import UnreachableAdmins
+from catchup import CatchUpTracker
+from system_filters import system_message_filter, filtered_classification
+from update_types import allowed_updates_for
+from http_pool import build_application
+from metrics import set_mode, watch_queues, start_metrics_server, CLASSIFY_SECONDS, DELETE_SECONDS
+from profiling import install_profiling
+from audit_log import OUTCOME_DELETED, OUTCOME_FAILED, OUTCOME_NO_RIGHTS, OUTCOME_RETRY
+
+logger = logging.getLogger(__name__)
+
+class BaseCleanerBot:
+    # Политика классификатора, метка режима для /metrics и строка в лог при запуске
+    POLICY = POLICY_DEFAULT
+    MODE = 'bot'
+    STARTUP_MESSAGE = "Запуск бота для очистки системных сообщений..."
+    # Отдельный сервер /metrics (bot_web.py отдает /metrics на основном порту)
+    METRICS_SERVER = True
+
+    def __init__(self, application=None):
+        # application можно передать готовым (например, с локальным BaseRequest в бенчмарках)
+        self.application = application or build_application()
+        self.classifier = MessageClassifier(self.POLICY)
+        self.admin_cache = AdminCache()
+        self.permissions = BotPermissionCache()
+        self.outbound = OutboundScheduler()
+        self.deleter = DeletionBatcher(self.application.bot, self.outbound)
+        self.retry_queue = DeletionRetryQueue(self.deleter, on_result=self.record_retry)
+        self.unreachable = UnreachableAdmins()
+        self.catchup = CatchUpTracker(self.application.bot, self.outbound, self.admin_cache, self.unreachable)
+        self.digest = NotificationDigest(self.application.bot, self.outbound, unreachable=self.unreachable) if NOTIFY_MODE == 'digest' else None
+        self.application.post_init = self.post_init
+        self.application.post_stop = self.post_stop
+        # Метка режима и измеряемые при запросе значения для /metrics
+        set_mode(self.MODE)
+        watch_queues(self.application, self.outbound)
+        self.metrics_server = None
+        self.setup_handlers()
+        # Замер обработчиков и команда /profile (только при PROFILING=true)
+        self.profiling = install_profiling(self)
+
+    def setup_handlers(self):
+        """Настройка обработчиков команд и сообщений"""
+        self.setup_commands()
+
+        # Сброс кэша администраторов при назначении/снятии администраторов (chat_member - только по ADMIN_CACHE_CHAT_MEMBER)
+        self.application.add_handler(ChatMemberHandler(self.admin_cache.handle_chat_member_update, ADMIN_CHAT_MEMBER_TYPES))
+        # Права бота в чате (отдельная группа: оба обработчика получают my_chat_member)
+        self.application.add_handler(ChatMemberHandler(self.permissions.handle_my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER), group=1)
+
+        # Обработчик системных сообщений: в режиме фильтра обычные сообщения отсекаются фильтрами PTB
+        message_filter = system_message_filter(self) if FILTER_MODE else filters.ALL
+        self.application.add_handler(MessageHandler(message_filter, self.handle_message))
+
+    def setup_commands(self):
+        """Команды бота (регистрируются раньше обработчика сообщений)"""
+        # Обработчик команды /start
+        self.application.add_handler(CommandHandler("start", self.start_command, filters=filters.UpdateType.MESSAGE))
+
+        # Обработчик команды /help
+        self.application.add_handler(CommandHandler("help", self.help_command, filters=filters.UpdateType.MESSAGE))
+
+        # Обработчик команды /status
+        self.application.add_handler(CommandHandler("status", self.status_command, filters=filters.UpdateType.MESSAGE))
+
+    def classify(self, message, bot_id=None):
+        """Классификация сообщения (используется фильтром и обработчиком)"""
+        return self.classifier.classify(message, bot_id)
+
+    def log_kept(self, message):
+        """Строка лога об оставленном обычном сообщении (по умолчанию не пишется)"""
+
+    def log_deleted(self, message, message_type, reason):
+        logger.info("Удалено системное сообщение типа %s (%s) в чате %s", message_type, reason, message.chat.id)
+
+    def deleted_text(self, message, message_type) -> str:
+        """Текст уведомления администраторов об удалении"""
+        return f"🗑️ В чате {message.chat.title} удалено системное сообщение типа: {message_type}"
+
+    def notifications_enabled(self, chat_id) -> bool:
+        """Уведомлять ли администраторов чата"""
+        return True
+
+    def record(self, chat_id, message_id, message_type, outcome):
+        """Результат обработки системного сообщения (OUTCOME_* из audit_log) для статистики бота"""
+
+    def record_retry(self, chat_id, message_id, message_type, deleted):
+        """Итог повтора из очереди: учитывается так же, как удаление с первой попытки"""
+        self.record(chat_id, message_id, message_type or 'unknown', OUTCOME_DELETED if deleted else OUTCOME_FAILED)
+
+    async def on_deleted(self, update, context, message_type):
+        """Дополнительные действия после удаления (до уведомления администраторов)"""
+
+    async def background(self, coroutine, update):
+        """Фоновая задача приложения; во время остановки PTB новые задачи не ждет, поэтому она выполняется сразу"""
+        if self.application.running:
+            self.application.create_task(coroutine, update=update)
+        else:
+            await coroutine
+
+    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик всех сообщений для удаления системных"""
+        message = update.message
+
+        # Проверяем, является ли сообщение системным (один проход классификатора: в режиме фильтра - в фильтре)
+        classification = filtered_classification(context)
+        if classification is None:
+            started = time.perf_counter()
+            classification = self.classify(message, context.bot.id)
+            CLASSIFY_SECONDS.observe(time.perf_counter() - started, classification.message_type or 'none')
+        is_system, message_type, reason = classification
+        if is_system:
+            # Удаление идет в фоне: системные сообщения чата копятся и удаляются одним deleteMessages
+            self.application.create_task(self.delete_system_message(update, context, message_type, reason), update=update)
+        else:
+            self.log_kept(message)
+
+    async def delete_system_message(self, update, context, message_type, reason):
+        """Удаляет системное сообщение и уведомляет администраторов"""
+        message = update.message
+        notify = self.notifications_enabled(message.chat.id)
+        self.catchup.observe(message)
+        # Без права удаления вызов заведомо завершится ошибкой: не удаляем и уведомляем не чаще раза за окно
+        if not await self.permissions.can_delete(message.chat, context.bot.id):
+            self.record(message.chat.id, message.message_id, message_type, OUTCOME_NO_RIGHTS)
+            if notify and self.permissions.should_notify(message.chat.id):
+                await self.background(self.notify_admins_privately(message, context, message_type, error=True), update)
+            return
+        started = time.perf_counter()
+        try:
+            # Удаляем системное сообщение
+            confirmed = await self.deleter.delete(message.chat.id, message.message_id)
+            DELETE_SECONDS.observe(time.perf_counter() - started, message_type, 'deleted' if confirmed else 'unconfirmed')
+            self.record(message.chat.id, message.message_id, message_type, OUTCOME_DELETED)
+            self.log_deleted(message, message_type, reason)
+            await self.on_deleted(update, context, message_type)
+
+            # Уведомляем только администраторов в личные сообщения (в фоне: лимиты отправки не задерживают следующие обновления)
+            if notify:
+                await self.background(self.notify_admins_privately(message, context, message_type, unconfirmed=not confirmed), update)
+
+        except Exception as e:
+            DELETE_SECONDS.observe(time.perf_counter() - started, message_type, 'error')
+            # Временные ошибки (сеть, 5xx, RetryAfter) - удаление будет повторено из очереди
+            if self.retry_queue.add(message.chat.id, message.message_id, e, message.date.timestamp(), message_type):
+                self.record(message.chat.id, message.message_id, message_type, OUTCOME_RETRY)
+                logger.warning(f"Удаление сообщения {message.message_id} в чате {message.chat.id} отложено: {e}")
+                return
+            self.record(message.chat.id, message.message_id, message_type, OUTCOME_FAILED)
+            logger.error(f"Ошибка при удалении сообщения: {e}")
+            # Права могли быть сняты: следующее сообщение чата перепроверит их
+            self.permissions.invalidate(message.chat.id)
+            # Если не удалось удалить, отправляем уведомление только администраторам (не чаще раза за окно)
+            if notify and self.permissions.should_notify(message.chat.id):
+                await self.background(self.notify_admins_privately(message, context, message_type, error=True), update)
+
+    async def notify_admins_privately(self, message, context, message_type=None, error=False, unconfirmed=False):
+        """Уведомляет администраторов в личные сообщения"""
+        kind = KIND_FAILED if error else KIND_UNCONFIRMED if unconfirmed else KIND_DELETED
+        # Сообщения, накопившиеся за время простоя, попадают в одну сводку по чату
+        if self.catchup.is_backlog(message):
+            self.catchup.add(message.chat, message_type, kind)
+            return
+        try:
+            admins = await self.admin_cache.get_administrators(message.chat)
+            if error:
+                notification_text = f"⚠️ Не удалось удалить системное сообщение в чате {message.chat.title}. Проверьте права бота."
+            elif unconfirmed:
+                notification_text = (f"🗑️ В чате {message.chat.title} отправлено удаление системного сообщения типа: "
+                                     f"{message_type} (без подтверждения Telegram)")
+            else:
+                notification_text = self.deleted_text(message, message_type)
+
+            admin_ids = [admin.user.id for admin in admins if admin.user.id != context.bot.id]  # Не уведомляем самого бота
+            # Администраторы, которым бот не может писать, пропускаются без запроса к API
+            admin_ids = self.unreachable.reachable(admin_ids)
+            if self.digest is not None:
+                # Режим сводки: событие уйдет администратору одним сообщением за окно
+                for admin_id in admin_ids:
+                    self.digest.add(admin_id, message.chat, message_type, kind)
+                return
+
+            # Рассылка идет параллельно в пределах лимитов планировщика; ошибки личных сообщений не критичны
+            results = await self.outbound.send_to_many(context.bot, admin_ids, notification_text)
+            self.unreachable.record(results)
+        except Exception as e:
+            logger.error(f"Ошибка при уведомлении администраторов: {e}")
+
+    async def post_init(self, application):
+        """Возобновляет повторы удалений, оставшиеся с прошлого запуска"""
+        self.retry_queue.start()
+        if self.METRICS_SERVER:
+            self.metrics_server = await start_metrics_server(application)
+
+    async def post_stop(self, application):
+        """Отправляет накопленные удаления, сводки и очередь исходящих вызовов при остановке бота"""
+        # Сначала последние пакеты удалений: их временные ошибки еще попадают в очередь повторов
+        await self.deleter.close()
+        # Ожидавшие пакетов удаления обрабатывают результаты до закрытия базы очереди повторов
+        await asyncio.sleep(0)
+        await self.retry_queue.close()
+        await self.catchup.close()
+        if self.digest is not None:
+            await self.digest.close()
+        await self.outbound.close()
+        await self.unreachable.close()
+        if self.profiling is not None:
+            self.profiling.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+
+    def run(self):
+        """Запуск бота"""
+        logger.info(self.STARTUP_MESSAGE)
+        # Запрашиваем у Telegram только те обновления, которые нужны зарегистрированным обработчикам
+        allowed_updates = allowed_updates_for(self.application)
+        logger.info(f"allowed_updates: {', '.join(allowed_updates)}")
+        self.application.run_polling(allowed_updates=allowed_updates)
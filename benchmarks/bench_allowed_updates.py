@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Объем трафика getUpdates при allowed_updates=Update.ALL_TYPES и при наборе, вычисленном
+по обработчикам (update_types.allowed_updates_for): байты, декодированные объекты PTB
+и время декодирования в пересчете на минуту при заданном потоке обновлений.
+
+Запуск: python benchmarks/bench_allowed_updates.py [--rate 6000] [--recording updates.jsonl]
+(--recording - записанные обновления getUpdates, по одному JSON на строку; по умолчанию
+используется синтетическая смесь TRAFFIC_MIX)
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+
+import advanced_bot
+import bot_safe
+from benchmarks.corpus import make_traffic_mix
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from update_types import allowed_updates_for
+
+
+def count_objects(data):
+    """Количество объектов (словарей), которые PTB превратит в TelegramObject"""
+    if isinstance(data, dict):
+        return 1 + sum(count_objects(value) for value in data.values())
+    if isinstance(data, list):
+        return sum(count_objects(value) for value in data)
+    return 0
+
+
+def measure(updates, allowed, batch=100):
+    """Байты ответов getUpdates, число объектов и время json.loads + Update.de_json"""
+    selected = [update for update in updates if next(key for key in update if key != 'update_id') in allowed]
+    payloads = [json.dumps({'ok': True, 'result': selected[i:i + batch]}, ensure_ascii=False).encode()
+                for i in range(0, len(selected), batch)]
+    started = time.perf_counter()
+    objects = 0
+    for payload in payloads:
+        for data in json.loads(payload)['result']:
+            objects += count_objects(data)
+            Update.de_json(data, None)
+    elapsed = time.perf_counter() - started
+    return len(selected), sum(map(len, payloads)), objects, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=int, default=6000, help="обновлений в минуту при ALL_TYPES")
+    parser.add_argument('--recording', help="JSONL с записанными обновлениями")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if args.recording:
+        with open(args.recording, encoding='utf-8') as f:
+            updates = [json.loads(line) for line in f if line.strip()][:args.rate]
+    else:
+        updates = make_traffic_mix(args.rate)
+    print(f"Смешанный трафик: {len(updates)} обновлений/мин при ALL_TYPES")
+    variants = [("ALL_TYPES", list(Update.ALL_TYPES))]
+    for title, module, cls in (("bot_safe", bot_safe, 'SafeSystemMessageCleanerBot'),
+                               ("advanced_bot", advanced_bot, 'AdvancedSystemMessageCleanerBot')):
+        application = Application.builder().token(BOT_TOKEN).request(OfflineRequest()).build()
+        getattr(module, cls)(application)
+        variants.append((title, allowed_updates_for(application)))
+
+    for title, allowed in variants:
+        count, size, objects, elapsed = measure(updates, set(allowed))
+        print(f"{title:13} обновлений/мин: {count:6}  КБ/мин: {size / 1024:8.1f}  объектов/мин: {objects:7}"
+              f"  декодирование мс/мин: {elapsed * 1000:7.1f}")
+        if title != "ALL_TYPES":
+            print(f"{'':13} allowed_updates: {', '.join(allowed)}")
+
+
+if __name__ == "__main__":
+    main()
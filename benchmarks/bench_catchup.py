@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Разбор очереди после простоя: --count системных сообщений часовой давности в --chats чатах.
+Без догоняющего режима (CATCHUP_AGE больше возраста очереди) каждое удаление порождает
+личные сообщения администраторам; в догоняющем режиме - одна сводка на чат.
+Время до удаления всей очереди и число личных сообщений (отправленных и ждущих в очереди
+планировщика). Bot API заменен локальным OfflineRequest с задержкой ответа --latency.
+
+Запуск: python benchmarks/bench_catchup.py [--count 2000] [--chats 20] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+from telegram.warnings import PTBUserWarning
+
+import bot
+from benchmarks.corpus import join_update
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+
+
+async def run_mode(catchup_age, raw_updates, latency):
+    request = OfflineRequest(latency=latency)
+    application = Application.builder().token(BOT_TOKEN).request(request).get_updates_request(OfflineRequest()).build()
+    cleaner = bot.SystemMessageCleanerBot(application)
+    cleaner.catchup.age = catchup_age
+    cleaner.catchup.idle = 0.5
+    await application.initialize()
+    updates = [Update.de_json(data, application.bot) for data in raw_updates]
+
+    started = time.perf_counter()
+    for update in updates:
+        await application.process_update(update)
+    while cleaner.deleter.deleted + cleaner.deleter.failed < len(updates):
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    # Сводки уходят после паузы idle; затем считаем личные сообщения, поставленные в очередь
+    await asyncio.sleep(cleaner.catchup.idle + 0.5)
+    direct_messages = request.calls['sendMessage'] + cleaner.outbound.queue_depth
+
+    await cleaner.outbound.close(timeout=0)
+    await application.shutdown()
+    return elapsed, request.calls, direct_messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help="задержка ответа Bot API, секунды")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+
+    date = int(time.time()) - 3600
+    raw_updates = [join_update(update_id, -1001000000000 - update_id % args.chats, update_id, date)
+                   for update_id in range(1, args.count + 1)]
+    print(f"Очередь: {args.count} системных сообщений часовой давности в {args.chats} чатах")
+    for title, catchup_age in (("обычный", 24 * 3600), ("догоняющий", 60)):
+        elapsed, calls, direct_messages = asyncio.run(run_mode(catchup_age, raw_updates, args.latency))
+        print(f"{title:11} удаление очереди: {elapsed:6.2f} с ({args.count / elapsed:6.0f} сообщ/с)"
+              f"   deleteMessages: {calls['deleteMessages']:4}   личных сообщений: {direct_messages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк классификации сообщений: старая логика (is_system_message + get_message_type)
+против общего классификатора из classifier.py
+
+В старой логике проверка `is not None` заменена на проверку истинности: иначе с PTB 21
+она останавливается на new_chat_members == () и считает системным любое сообщение.
+
+Запуск: python benchmarks/bench_classifier.py [--count 20000] [--system-ratio 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Message
+
+from benchmarks.corpus import make_updates
+from classifier import MessageClassifier, POLICY_DEFAULT
+from config import SYSTEM_MESSAGE_TYPES
+
+
+def legacy_is_system_message(message) -> bool:
+    """Прежняя проверка из bot.py (для сравнения)"""
+    for message_type in SYSTEM_MESSAGE_TYPES:
+        if getattr(message, message_type, None):
+            return True
+    if message.text:
+        if any(keyword in message.text for keyword in [
+            'добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась',
+            'added', 'joined', 'присоединился к группе', 'присоединилась к группе'
+        ]):
+            return True
+        if any(keyword in message.text for keyword in [
+            'покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла',
+            'покинул группу', 'покинула группу', 'ушел из группы', 'ушла из группы'
+        ]):
+            return True
+        if any(keyword in message.text for keyword in [
+            'изменил(а) название', 'изменил название', 'изменила название',
+            'изменил(а) фото', 'изменил фото', 'изменила фото',
+            'удалил(а) фото', 'удалил фото', 'удалила фото',
+            'закрепил(а)', 'закрепил', 'закрепила', 'pinned'
+        ]):
+            return True
+    if message.text is None and not any([
+        message.photo, message.video, message.audio, message.document,
+        message.voice, message.video_note, message.sticker, message.animation
+    ]):
+        return True
+    return False
+
+
+def legacy_get_message_type(message) -> str:
+    """Прежнее определение типа из bot.py (для сравнения)"""
+    for message_type in SYSTEM_MESSAGE_TYPES:
+        if getattr(message, message_type, None):
+            return message_type
+    if message.text:
+        if any(keyword in message.text for keyword in ['добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась', 'added', 'joined']):
+            return 'new_chat_members'
+        elif any(keyword in message.text for keyword in ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']):
+            return 'left_chat_member'
+        elif any(keyword in message.text for keyword in ['название', 'title']):
+            return 'new_chat_title'
+        elif any(keyword in message.text for keyword in ['фото', 'photo']):
+            return 'new_chat_photo'
+        elif any(keyword in message.text for keyword in ['закрепил(а)', 'закрепил', 'закрепила', 'pinned']):
+            return 'pinned_message'
+    return "unknown"
+
+
+def legacy_classify(message):
+    # Удаляемое сообщение классифицировалось дважды: в handle_message и в notify_admins_privately
+    if legacy_is_system_message(message):
+        legacy_get_message_type(message)
+        legacy_get_message_type(message)
+
+
+def measure(func, messages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            func(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--system-ratio', type=float, default=0.05)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    messages = [Message.de_json(update['message'], None) for update in make_updates(args.count, args.system_ratio)]
+    classifier = MessageClassifier(POLICY_DEFAULT)
+
+    legacy_ns = measure(legacy_classify, messages, args.repeat)
+    compiled_ns = measure(classifier.classify, messages, args.repeat)
+
+    print(f"Сообщений: {len(messages)}, доля системных: {args.system_ratio:.2%}")
+    print(f"Старая логика:       {legacy_ns:8.0f} нс/сообщение")
+    print(f"Общий классификатор: {compiled_ns:8.0f} нс/сообщение")
+    print(f"Ускорение:           {legacy_ns / compiled_ns:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Блокировка очереди медленным чатом: в одном чате вызовы Bot API отвечают с задержкой --slow-latency
+(участники шлют команды, бот отвечает), остальные --chats чатов получают вступления, которые нужно
+удалить. Сравнивается последовательная обработка и ChatOrderedProcessor (UPDATE_CONCURRENCY):
+задержка от поступления обновления быстрого чата до начала его обработки (p50/p99), время до
+удаления всех системных сообщений быстрых чатов и соблюдение порядка обновлений внутри каждого чата.
+
+Запуск: python benchmarks/bench_concurrency.py [--count 2000] [--chats 20] [--slow-every 10] [--slow-latency 0.2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+from telegram.warnings import PTBUserWarning
+
+import base_bot
+import bot
+from benchmarks.corpus import command_update, join_update
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from update_processor import ChatOrderedProcessor
+
+SLOW_CHAT = -1009000000000
+
+
+def make_stream(count, chats, slow_every):
+    """Поток обновлений: каждое slow_every-е - команда в медленном чате, остальные - вступления"""
+    stream = []
+    for update_id in range(1, count + 1):
+        if update_id % slow_every == 0:
+            stream.append(command_update(update_id, SLOW_CHAT, update_id))
+        else:
+            stream.append(join_update(update_id, -1001000000000 - update_id % chats, update_id))
+    return stream
+
+
+async def run_mode(concurrency, raw_updates, slow_latency):
+    request = OfflineRequest(slow_chats={SLOW_CHAT}, slow_latency=slow_latency)
+    builder = Application.builder().token(BOT_TOKEN).request(request).get_updates_request(OfflineRequest())
+    if concurrency > 1:
+        builder.concurrent_updates(ChatOrderedProcessor(concurrency))
+    application = builder.build()
+    cleaner = bot.SystemMessageCleanerBot(application)
+
+    enqueued = {}
+    delays = []
+    order = {}
+
+    async def observe(update, context):
+        # Группа -1: вызывается в начале обработки обновления, до обработчиков бота
+        chat_id = update.effective_chat.id
+        order.setdefault(chat_id, []).append(update.update_id)
+        if chat_id != SLOW_CHAT:
+            delays.append(time.perf_counter() - enqueued[update.update_id])
+
+    application.add_handler(TypeHandler(Update, observe), group=-1)
+    await application.initialize()
+    await application.start()
+    updates = [Update.de_json(data, application.bot) for data in raw_updates]
+    fast = sum(1 for update in updates if update.effective_chat.id != SLOW_CHAT)
+
+    started = time.perf_counter()
+    for update in updates:
+        enqueued[update.update_id] = time.perf_counter()
+        await application.update_queue.put(update)
+    while cleaner.deleter.deleted + cleaner.deleter.failed < fast:
+        await asyncio.sleep(0.005)
+    fast_done = time.perf_counter() - started
+    await application.update_queue.join()
+    drained = time.perf_counter() - started
+
+    ordered = all(ids == sorted(ids) for ids in order.values())
+    processor = application.update_processor
+    peak_depth = processor.stats()['peak_queue_depth'] if isinstance(processor, ChatOrderedProcessor) else None
+    await application.stop()
+    await cleaner.outbound.close(timeout=0)
+    await application.shutdown()
+    delays.sort()
+    return fast_done, drained, delays, ordered, peak_depth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--slow-every', type=int, default=10, help="каждое N-е обновление - в медленном чате")
+    parser.add_argument('--slow-latency', type=float, default=0.2, help="задержка Bot API в медленном чате, секунды")
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    base_bot.NOTIFY_MODE = 'digest'
+
+    raw_updates = make_stream(args.count, args.chats, args.slow_every)
+    print(f"Обновлений: {args.count}, быстрых чатов: {args.chats}, в медленном чате: {args.count // args.slow_every}"
+          f" (задержка API {args.slow_latency * 1000:.0f} мс)")
+    for title, concurrency in (("последовательно", 1), (f"параллельно ({args.concurrency})", args.concurrency)):
+        fast_done, drained, delays, ordered, peak_depth = asyncio.run(
+            run_mode(concurrency, raw_updates, args.slow_latency))
+        p50 = delays[len(delays) // 2] * 1000
+        p99 = delays[int(len(delays) * 0.99)] * 1000
+        print(f"{title:17} ожидание быстрых чатов p50: {p50:8.1f} мс  p99: {p99:8.1f} мс"
+              f"   удалены за {fast_done:6.2f} с   вся очередь: {drained:6.2f} с"
+              f"   порядок в чатах: {'соблюден' if ordered else 'НАРУШЕН'}"
+              + (f"   пик очереди: {peak_depth}" if peak_depth is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Рейд вступлений: поток системных сообщений new_chat_members в нескольких чатах.
+Число вызовов deleteMessage/deleteMessages и время до удаления всех сообщений при
+удалении по одному (пакет из 1 id) и при пакетном удалении DeletionBatcher.
+Bot API заменен локальным OfflineRequest с задержкой ответа --latency.
+
+Запуск: python benchmarks/bench_deletion.py [--count 1000] [--chats 3] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+from telegram.warnings import PTBUserWarning
+
+import base_bot
+import bot_safe
+from benchmarks.corpus import join_update
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from deletion import DeletionBatcher
+
+
+def make_raid(count, chats):
+    """Обновления рейда: только вступления, чаты чередуются"""
+    return [join_update(update_id, -1001000000000 - update_id % chats, update_id) for update_id in range(1, count + 1)]
+
+
+async def run_mode(max_batch, raw_updates, latency):
+    request = OfflineRequest(latency=latency)
+    application = Application.builder().token(BOT_TOKEN).request(request).get_updates_request(OfflineRequest()).build()
+    bot = bot_safe.SafeSystemMessageCleanerBot(application)
+    bot.deleter = DeletionBatcher(application.bot, bot.outbound, max_batch=max_batch)
+    await application.initialize()
+    updates = [Update.de_json(data, application.bot) for data in raw_updates]
+
+    started = time.perf_counter()
+    for update in updates:
+        await application.process_update(update)
+    while bot.deleter.deleted + bot.deleter.failed < len(updates):
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+
+    await bot.post_stop(application)
+    await application.shutdown()
+    return elapsed, request.calls, bot.deleter.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--chats', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.05, help="задержка ответа Bot API, секунды")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    # Приложение не запускается (start), поэтому PTB предупреждает о задачах create_task
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    # Уведомления копятся в сводке и не влияют на замер удалений
+    base_bot.NOTIFY_MODE = 'digest'
+
+    raw_updates = make_raid(args.count, args.chats)
+    print(f"Рейд: {args.count} вступлений в {args.chats} чатах, задержка API {args.latency * 1000:.0f} мс")
+    for title, max_batch in (("по одному", 1), ("пакетами", 100)):
+        elapsed, calls, stats = asyncio.run(run_mode(max_batch, raw_updates, args.latency))
+        print(f"{title:10} {elapsed:7.2f} с   deleteMessage: {calls['deleteMessage']:5}"
+              f"   deleteMessages: {calls['deleteMessages']:4}   удалено: {stats['deleted']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность bot_safe.py (обновлений/с) при смеси 99:1 обычных и системных сообщений:
+обработчик на filters.ALL против режима фильтра (FILTER_MODE), где обычные сообщения
+отсекаются фильтрами PTB. Bot API заменен локальным OfflineRequest. Замер заканчивается после
+завершения фоновых удалений (application.stop()); уведомления администраторов копятся в сводке.
+
+Запуск: python benchmarks/bench_filters.py [--count 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+
+import base_bot
+import bot_safe
+from benchmarks.corpus import make_updates
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from logging_setup import setup_logging
+
+
+async def run_mode(filter_mode, raw_updates):
+    base_bot.FILTER_MODE = filter_mode
+    request = OfflineRequest()
+    application = Application.builder().token(BOT_TOKEN).request(request).get_updates_request(OfflineRequest()).build()
+    bot_safe.SafeSystemMessageCleanerBot(application)
+    await application.initialize()
+    await application.start()
+    updates = [Update.de_json(data, application.bot) for data in raw_updates]
+
+    started = time.perf_counter()
+    for update in updates:
+        await application.process_update(update)
+    # stop() ждет задачи create_task: удаления системных сообщений входят в замер
+    await application.stop()
+    elapsed = time.perf_counter() - started
+
+    await application.shutdown()
+    return len(updates) / elapsed, request.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--system-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+
+    # Логи пишутся, как в рабочем режиме, но в /dev/null, чтобы не мерить скорость терминала
+    setup_logging(open(os.devnull, 'w'), force=True)
+    # Уведомления копятся в сводке: лимит личных сообщений не должен определять замер
+    base_bot.NOTIFY_MODE = 'digest'
+
+    raw_updates = make_updates(args.count, args.system_ratio)
+    print(f"Обновлений: {args.count}, доля системных: {args.system_ratio:.2%}")
+    for title, filter_mode in (("filters.ALL", False), ("FILTER_MODE", True)):
+        rate, calls = asyncio.run(run_mode(filter_mode, raw_updates))
+        print(f"{title:12} {rate:10.0f} обновлений/с   вызовы API: {dict(calls)}")
+
+
+if __name__ == "__main__":
+    main()
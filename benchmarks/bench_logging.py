@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность обработчика bot_safe.py (обновлений/с) на filters.ALL, где каждое обычное
+сообщение пишет строку "Обычное сообщение оставлено", при разных настройках логирования: логи
+выключены, запись из цикла событий (LOG_MODE=sync), фоновый поток (LOG_MODE=queue) в тексте и
+JSON, фоновый поток с выборкой строк по LOG_SAMPLING. Логи пишутся во временный файл; время
+дописывания очереди после прогона показано отдельно. Bot API заменен локальным OfflineRequest.
+
+Запуск: python benchmarks/bench_logging.py [--count 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Update
+from telegram.ext import Application
+from telegram.warnings import PTBUserWarning
+
+import base_bot
+import bot_safe
+from benchmarks.corpus import make_updates
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from logging_setup import SAMPLING, SampledLogger, setup_logging, stop_logging
+
+# (название, режим, формат, выборка строк "оставлено"); режим None - логи выключены
+CASES = (
+    ("выключены", None, 'text', (1.0, 0)),
+    ("sync text", 'sync', 'text', (1.0, 0)),
+    ("queue text", 'queue', 'text', (1.0, 0)),
+    ("queue json", 'queue', 'json', (1.0, 0)),
+    ("queue выборка", 'queue', 'text', SAMPLING.get('kept', (1.0, 0))),
+)
+
+
+async def run_case(raw_updates):
+    application = Application.builder().token(BOT_TOKEN).request(OfflineRequest()).get_updates_request(OfflineRequest()).build()
+    bot_safe.SafeSystemMessageCleanerBot(application)
+    await application.initialize()
+    updates = [Update.de_json(data, application.bot) for data in raw_updates]
+
+    started = time.perf_counter()
+    for update in updates:
+        await application.process_update(update)
+    elapsed = time.perf_counter() - started
+
+    await application.shutdown()
+    return len(updates) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--system-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+
+    # Удаления запускаются задачами до application.start()
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    base_bot.FILTER_MODE = False
+    raw_updates = make_updates(args.count, args.system_ratio)
+    print(f"Обновлений: {args.count}, доля системных: {args.system_ratio:.2%}")
+    with tempfile.TemporaryDirectory() as directory:
+        for title, mode, log_format, (sample, rate) in CASES:
+            path = os.path.join(directory, f"{title}.log")
+            with open(path, 'w', encoding='utf-8') as stream:
+                setup_logging(stream, mode=mode or 'sync', log_format=log_format,
+                              level='INFO' if mode else 'WARNING', force=True)
+                bot_safe.kept_log = SampledLogger(bot_safe.logger, 'kept', sample, rate)
+                rate_per_second = asyncio.run(run_case(raw_updates))
+                drain_started = time.perf_counter()
+                stop_logging()
+                drain = time.perf_counter() - drain_started
+            with open(path, encoding='utf-8') as stream:
+                lines = sum(1 for _ in stream)
+            print(f"{title:14} {rate_per_second:10.0f} обновлений/с   строк: {lines:6}   дописывание: {drain * 1000:6.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
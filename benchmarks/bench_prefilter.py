@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Предфильтр webhook по сырому JSON (WEBHOOK_PREFILTER) на смеси с преобладанием обычных
+сообщений: процессорное время и пиковый объем выделенной памяти на одно обновление в
+WebhookServer.handle_webhook без предфильтра (json + Update.de_json для каждого обновления)
+и с предфильтром (orjson, объекты PTB только для системных сообщений и команд).
+
+Запуск: python benchmarks/bench_prefilter.py [--count 20000] [--system-ratio 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import Application
+
+import bot_web
+import webhook_server
+from benchmarks.corpus import make_updates
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN, WEBHOOK_SECRET
+from webhook_server import WebhookServer
+
+
+HEADERS = {webhook_server.SECRET_HEADER: WEBHOOK_SECRET}
+
+
+async def measure(server, bodies):
+    """Процессорное время (мкс), пиковая выделенная память (байт) на обновление и число отброшенных"""
+    queue = server.application.update_queue
+    started = time.process_time()
+    for body in bodies:
+        await server.handle_webhook(HEADERS, body)
+        while queue.qsize():
+            queue.get_nowait()
+    cpu = (time.process_time() - started) / len(bodies) * 1e6
+    filtered = server.filtered
+
+    sample = bodies[:2000]
+    peaks = 0
+    tracemalloc.start()
+    for body in sample:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        await server.handle_webhook(HEADERS, body)
+        peaks += tracemalloc.get_traced_memory()[1] - current
+        while queue.qsize():
+            queue.get_nowait()
+    tracemalloc.stop()
+    return cpu, peaks / len(sample), filtered
+
+
+async def run(bodies):
+    application = Application.builder().token(BOT_TOKEN).request(OfflineRequest()).build()
+    cleaner = bot_web.SystemMessageCleanerBot(application)
+    await application.initialize()
+    results = []
+    for title, prefilter, loads in (("без предфильтра", None, json.loads),
+                                    ("с предфильтром", cleaner.needs_update, webhook_server.json_loads)):
+        webhook_server.json_loads = loads
+        server = WebhookServer(application, queue_size=len(bodies) + 1, prefilter=prefilter)
+        results.append((title, *await measure(server, bodies)))
+    await application.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--system-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+
+    bodies = [json.dumps(update, ensure_ascii=False).encode() for update in make_updates(args.count, args.system_ratio)]
+    print(f"Обновлений: {args.count}, доля системных: {args.system_ratio:.2%}, JSON: {webhook_server.json_loads.__module__}")
+    for title, cpu, peak, filtered in asyncio.run(run(bodies)):
+        print(f"{title:16} CPU: {cpu:7.1f} мкс/обновление   пик памяти: {peak / 1024:6.1f} КБ/обновление"
+              f"   отброшено: {filtered}")
+
+
+if __name__ == "__main__":
+    main()
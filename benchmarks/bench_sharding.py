@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Масштабирование шардированного режима (sharding.py) по числу рабочих процессов: приемник
+распределяет --count обновлений из --chats чатов по chat_id и ждет, пока все процессы их
+обработают. Выводит пропускную способность (обновлений/с) и ускорение относительно одного
+процесса. Bot API в рабочих процессах заменен локальным OfflineRequest; предфильтр выключен,
+чтобы вся обработка шла в рабочих процессах. Ускорение ограничено числом ядер машины.
+
+Запуск: python benchmarks/bench_sharding.py [--count 20000] [--chats 200] [--workers 1 2 4]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import Application
+from telegram.warnings import PTBUserWarning
+
+from benchmarks.corpus import make_updates
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN
+from sharding import ShardIngress, run_worker
+
+
+def worker_main(shard, link_port):
+    """Рабочий процесс бенчмарка: приложение bot_web с локальным Bot API"""
+    import base_bot
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    base_bot.NOTIFY_MODE = 'digest'
+    application = Application.builder().token(BOT_TOKEN).request(OfflineRequest()).build()
+    asyncio.run(run_worker(shard, link_port, application))
+
+
+async def run(workers, bodies):
+    ingress = ShardIngress(workers, worker_command=[sys.executable, os.path.abspath(__file__), '--worker'])
+    await ingress.start_workers()
+    # Прогрев: импорт и первые обновления в каждом процессе не входят в замер
+    for body, data in bodies[:200]:
+        await ingress.route(body, data)
+    await ingress.barrier()
+
+    started = time.perf_counter()
+    for body, data in bodies:
+        await ingress.route(body, data)
+    await ingress.barrier()
+    elapsed = time.perf_counter() - started
+    routed = list(ingress.routed)
+    await ingress.stop()
+    return elapsed, routed
+
+
+def main():
+    if sys.argv[1:2] == ['--worker']:
+        worker_main(int(sys.argv[2]), int(sys.argv[3]))
+        return
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--system-ratio', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    # Файлы состояния рабочих процессов - во временном каталоге
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench-sharding-')
+
+    updates = make_updates(args.count, args.system_ratio, chats=args.chats)
+    bodies = [(json.dumps(update, ensure_ascii=False).encode(), update) for update in updates]
+    print(f"Обновлений: {args.count}, чатов: {args.chats}, доля системных: {args.system_ratio:.0%}, "
+          f"ядер CPU: {os.cpu_count()}")
+    baseline = None
+    for workers in args.workers:
+        elapsed, routed = asyncio.run(run(workers, bodies))
+        rate = args.count / elapsed
+        baseline = baseline or rate
+        print(f"процессов: {workers}   {rate:8.0f} обновлений/с   ускорение: {rate / baseline:4.2f}x"
+              f"   по процессам: {routed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест webhook-сервера bot_web.py: локальный отправитель вместо Telegram держит
+--connections keep-alive соединений и шлет --count обновлений POST /webhook. Выводит
+устойчивую пропускную способность (запросов/с), p50/p99 задержки ответа и число обновлений,
+обработанных приложением. С --inline удаление отправляется в ответе на webhook-запрос
+(WEBHOOK_INLINE_DELETE): выводится число сэкономленных вызовов deleteMessage(s).
+Bot API заменен локальным OfflineRequest.
+
+Запуск: python benchmarks/bench_webhook.py [--count 20000] [--connections 40] [--inline]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import Application
+from telegram.warnings import PTBUserWarning
+
+import base_bot
+import bot_web
+from benchmarks.corpus import make_updates
+from benchmarks.offline import OfflineRequest
+from config import BOT_TOKEN, WEBHOOK_PATH, WEBHOOK_SECRET
+from webhook_server import WebhookServer
+
+
+async def sender(port, bodies, latencies):
+    """Одно keep-alive соединение: запросы по очереди, как у Telegram"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for body in bodies:
+        started = time.perf_counter()
+        writer.write(f"POST {WEBHOOK_PATH} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                     f"X-Telegram-Bot-Api-Secret-Token: {WEBHOOK_SECRET}\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        status = await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+        if not status.startswith(b'HTTP/1.1 200'):
+            raise RuntimeError(status.decode().strip())
+    writer.close()
+
+
+async def run(count, connections, system_ratio, inline):
+    request = OfflineRequest()
+    application = Application.builder().token(BOT_TOKEN).request(request).build()
+    cleaner = bot_web.SystemMessageCleanerBot(application)
+    await application.initialize()
+    await application.start()
+    server = WebhookServer(application, queue_size=count + 1, inline_action=cleaner.inline_delete if inline else None)
+    await server.start('127.0.0.1', 0)
+
+    bodies = [json.dumps(update, ensure_ascii=False).encode() for update in make_updates(count, system_ratio)]
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(server.port, bodies[i::connections], latencies) for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    # Дожидаемся, пока приложение разберет очередь
+    while application.update_queue.qsize():
+        await asyncio.sleep(0.01)
+    drained = time.perf_counter() - started
+
+    await server.stop()
+    await application.stop()
+    await cleaner.post_stop(application)
+    await application.shutdown()
+    return elapsed, drained, sorted(latencies), request.calls, server.inline_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=40, help="одновременных соединений (max_connections webhook)")
+    parser.add_argument('--system-ratio', type=float, default=0.01)
+    parser.add_argument('--inline', action='store_true', help="удаление в ответе на webhook-запрос")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore', category=PTBUserWarning)
+    # Личные уведомления ограничены лимитами Telegram и не относятся к HTTP пути: копим их в сводке
+    base_bot.NOTIFY_MODE = 'digest'
+
+    elapsed, drained, latencies, calls, inline_calls = asyncio.run(
+        run(args.count, args.connections, args.system_ratio, args.inline))
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"Запросов: {args.count}, соединений: {args.connections}, доля системных: {args.system_ratio:.2%}")
+    print(f"{args.count / elapsed:8.0f} запросов/с   p50: {p50:6.2f} мс   p99: {p99:6.2f} мс"
+          f"   очередь разобрана за {drained:.2f} с")
+    print(f"deleteMessage: {calls['deleteMessage']}   deleteMessages: {calls['deleteMessages']}"
+          f"   удалений в ответе на webhook: {inline_calls}")
+
+
+if __name__ == "__main__":
+    main()
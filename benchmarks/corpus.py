@@ -0,0 +1,165 @@
+"""
+Синтетический корпус обновлений Telegram для бенчмарков
+"""
+
+import random
+import time
+
+USER_TEXTS = [
+    'Привет всем!',
+    'Как дела?',
+    'Кто идет сегодня на встречу?',
+    'Скиньте ссылку на документ, пожалуйста',
+    'ok, thanks',
+    'see you tomorrow',
+    'Отличная идея, поддерживаю',
+    'Я опоздаю минут на десять',
+]
+
+SYSTEM_TEXTS = [
+    'Владислав добавил(а) DelSysmess',
+    'Анна покинула группу',
+    'Иван изменил название группы',
+    'Мария закрепила сообщение',
+]
+
+# Даты сообщений - текущие, чтобы бот обрабатывал их в обычном, а не в догоняющем режиме
+BASE_DATE = int(time.time())
+
+
+def _base(update_id, chat_id, message_id, date=None):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': message_id,
+            'date': BASE_DATE if date is None else date,
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': f'Чат {chat_id}'},
+        },
+    }
+
+
+def user_update(update_id, chat_id, message_id, rng):
+    update = _base(update_id, chat_id, message_id)
+    message = update['message']
+    message['from'] = {'id': 1000 + rng.randrange(500), 'is_bot': False, 'first_name': 'User'}
+    if rng.random() < 0.15:
+        message['photo'] = [{'file_id': 'p', 'file_unique_id': 'p', 'width': 90, 'height': 90}]
+    else:
+        message['text'] = rng.choice(USER_TEXTS)
+    return update
+
+
+def system_update(update_id, chat_id, message_id, rng):
+    update = _base(update_id, chat_id, message_id)
+    message = update['message']
+    message['from'] = {'id': 1000 + rng.randrange(500), 'is_bot': False, 'first_name': 'User'}
+    kind = rng.randrange(5)
+    if kind == 0:
+        message['new_chat_members'] = [{'id': 7, 'is_bot': False, 'first_name': 'New'}]
+    elif kind == 1:
+        message['left_chat_member'] = {'id': 8, 'is_bot': False, 'first_name': 'Gone'}
+    elif kind == 2:
+        message['new_chat_title'] = 'Новое название'
+    elif kind == 3:
+        message['pinned_message'] = {'message_id': 1, 'date': 1700000000, 'chat': message['chat']}
+    else:
+        del message['from']
+        message['text'] = rng.choice(SYSTEM_TEXTS)
+    return update
+
+
+def join_update(update_id, chat_id, message_id, date=None):
+    """Вступление нового участника (рейд вступлений)"""
+    update = _base(update_id, chat_id, message_id, date)
+    message = update['message']
+    message['from'] = {'id': 10000 + update_id, 'is_bot': False, 'first_name': 'Raider'}
+    message['new_chat_members'] = [message['from']]
+    return update
+
+
+def command_update(update_id, chat_id, message_id, command='/help'):
+    """Команда бота от участника чата"""
+    update = _base(update_id, chat_id, message_id)
+    message = update['message']
+    message['from'] = {'id': 2000 + update_id % 100, 'is_bot': False, 'first_name': 'User'}
+    message['text'] = command
+    message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+    return update
+
+
+def make_updates(count, system_ratio=0.01, chats=50, seed=42):
+    """Возвращает список словарей обновлений с заданной долей системных сообщений"""
+    rng = random.Random(seed)
+    updates = []
+    for update_id in range(1, count + 1):
+        chat_id = -1001000000000 - rng.randrange(chats)
+        if rng.random() < system_ratio:
+            updates.append(system_update(update_id, chat_id, update_id, rng))
+        else:
+            updates.append(user_update(update_id, chat_id, update_id, rng))
+    return updates
+
+
+# Доли типов обновлений в смешанном трафике группы (приближение к записи getUpdates с ALL_TYPES)
+TRAFFIC_MIX = (
+    ('message', 0.62),
+    ('edited_message', 0.08),
+    ('message_reaction', 0.14),
+    ('message_reaction_count', 0.03),
+    ('callback_query', 0.03),
+    ('poll_answer', 0.03),
+    ('poll', 0.01),
+    ('chat_member', 0.04),
+    ('inline_query', 0.01),
+    ('chat_boost', 0.005),
+    ('my_chat_member', 0.005),
+)
+
+_USER = {'id': 1234, 'is_bot': False, 'first_name': 'User', 'username': 'user', 'language_code': 'ru'}
+_CHAT = {'id': -1001000000000, 'type': 'supergroup', 'title': 'Чат'}
+_MEMBER = {'status': 'member', 'user': _USER}
+
+
+def _payload(update_type, update_id, rng):
+    message = user_update(update_id, _CHAT['id'], update_id, rng)['message']
+    if update_type in ('message', 'edited_message'):
+        if update_type == 'edited_message':
+            message['edit_date'] = message['date'] + 30
+        elif rng.random() < 0.05:
+            message = system_update(update_id, _CHAT['id'], update_id, rng)['message']
+        return message
+    if update_type == 'message_reaction':
+        return {'chat': _CHAT, 'message_id': update_id, 'user': _USER, 'date': 1700000000,
+                'old_reaction': [], 'new_reaction': [{'type': 'emoji', 'emoji': '👍'}]}
+    if update_type == 'message_reaction_count':
+        return {'chat': _CHAT, 'message_id': update_id, 'date': 1700000000,
+                'reactions': [{'type': {'type': 'emoji', 'emoji': '👍'}, 'total_count': 3}]}
+    if update_type == 'callback_query':
+        return {'id': str(update_id), 'from': _USER, 'chat_instance': '42', 'data': 'vote_1', 'message': message}
+    if update_type == 'poll_answer':
+        return {'poll_id': '77', 'user': _USER, 'option_ids': [1]}
+    if update_type == 'poll':
+        return {'id': '77', 'question': 'Куда идем?', 'total_voter_count': 12, 'is_closed': False,
+                'is_anonymous': False, 'type': 'regular', 'allows_multiple_answers': False,
+                'options': [{'text': 'Кино', 'voter_count': 5}, {'text': 'Парк', 'voter_count': 7}]}
+    if update_type in ('chat_member', 'my_chat_member'):
+        return {'chat': _CHAT, 'from': _USER, 'date': 1700000000,
+                'old_chat_member': dict(_MEMBER, status='left'), 'new_chat_member': _MEMBER}
+    if update_type == 'inline_query':
+        return {'id': str(update_id), 'from': _USER, 'query': 'котики', 'offset': ''}
+    if update_type == 'chat_boost':
+        return {'chat': _CHAT, 'boost': {'boost_id': 'b', 'add_date': 1700000000, 'expiration_date': 1710000000,
+                                         'source': {'source': 'premium', 'user': _USER}}}
+    raise ValueError(update_type)
+
+
+def make_traffic_mix(count, seed=42):
+    """Возвращает список словарей обновлений разных типов в пропорциях TRAFFIC_MIX"""
+    rng = random.Random(seed)
+    names = [name for name, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight in TRAFFIC_MIX]
+    updates = []
+    for update_id in range(1, count + 1):
+        update_type = rng.choices(names, weights)[0]
+        updates.append({'update_id': update_id, update_type: _payload(update_type, update_id, rng)})
+    return updates
@@ -0,0 +1,87 @@
+"""
+Локальная замена Bot API для бенчмарков: отвечает на запросы без обращения к сети
+"""
+
+import asyncio
+import json
+from collections import Counter
+
+from telegram.request import BaseRequest
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Cleaner', 'username': 'cleaner_bot',
+            'can_join_groups': True, 'can_read_all_group_messages': True, 'supports_inline_queries': False}
+
+
+ADMIN_RIGHTS = {'can_be_edited': False, 'is_anonymous': False, 'can_manage_chat': True, 'can_delete_messages': True,
+                'can_manage_video_chats': True, 'can_restrict_members': True, 'can_promote_members': False,
+                'can_change_info': True, 'can_invite_users': True, 'can_post_stories': False,
+                'can_edit_stories': False, 'can_delete_stories': False}
+
+
+def _admins(count):
+    admins = [dict(ADMIN_RIGHTS, status='administrator', user=BOT_USER)]
+    for index in range(count):
+        user = {'id': 100 + index, 'is_bot': False, 'first_name': f'Admin{index}'}
+        if index == 0:
+            admins.append({'status': 'creator', 'is_anonymous': False, 'user': user})
+        else:
+            admins.append(dict(ADMIN_RIGHTS, status='administrator', user=user))
+    return admins
+
+
+class OfflineRequest(BaseRequest):
+    """
+    Отвечает на вызовы Bot API фиксированными успешными ответами.
+    latency - искусственная задержка ответа (секунды), slow_chats - чаты с задержкой slow_latency,
+    blocked - пользователи, заблокировавшие бота (sendMessage им отвечает 403),
+    no_rights - чаты, где бот обычный участник (getChatMember без прав, удаление - 400).
+    """
+
+    def __init__(self, admins=2, latency=0.0, slow_chats=(), slow_latency=0.0, blocked=(), no_rights=()):
+        self.calls = Counter()
+        self.admins = admins
+        self.latency = latency
+        self.slow_chats = set(slow_chats)
+        self.slow_latency = slow_latency
+        self.blocked = set(blocked)
+        self.no_rights = set(no_rights)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _result(self, method, params):
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getChatAdministrators':
+            return _admins(self.admins)
+        if method == 'getChatMember':
+            if int(params.get('chat_id', 0)) in self.no_rights:
+                return {'status': 'member', 'user': BOT_USER}
+            return _admins(0)[0]
+        if method == 'sendMessage':
+            return {'message_id': 1, 'date': 1700000000, 'text': params.get('text', ''),
+                    'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'}}
+        if method == 'getUpdates':
+            return []
+        return True
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] += 1
+        params = request_data.parameters if request_data else {}
+        delay = self.latency
+        if self.slow_chats and params.get('chat_id') is not None and int(params['chat_id']) in self.slow_chats:
+            delay = self.slow_latency
+        if delay:
+            await asyncio.sleep(delay)
+        if api_method == 'sendMessage' and int(params.get('chat_id', 0)) in self.blocked:
+            return 403, json.dumps({'ok': False, 'error_code': 403,
+                                    'description': 'Forbidden: bot was blocked by the user'}).encode()
+        if api_method.startswith('deleteMessage') and int(params.get('chat_id', 0)) in self.no_rights:
+            return 400, json.dumps({'ok': False, 'error_code': 400,
+                                    'description': "Bad Request: message can't be deleted"}).encode()
+        return 200, json.dumps({'ok': True, 'result': self._result(api_method, params)}).encode()
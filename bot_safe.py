@@ -1,36 +1,36 @@
 import logging
 from telegram import Update
-from telegram.ext import Application, MessageHandler, CommandHandler, filters, ContextTypes
-from config import BOT_TOKEN, SYSTEM_MESSAGE_TYPES
+from telegram.ext import ContextTypes
+from classifier import POLICY_SAFE
+from base_bot import BaseCleanerBot
+from logging_setup import setup_logging, sampled
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Настройка логирования (LOG_MODE, LOG_FORMAT)
+setup_logging()
 logger = logging.getLogger(__name__)
+kept_log = sampled(logger, 'kept')
 
-class SafeSystemMessageCleanerBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
-        self.setup_handlers()
+class SafeSystemMessageCleanerBot(BaseCleanerBot):
+    POLICY = POLICY_SAFE
+    MODE = 'safe'
+    STARTUP_MESSAGE = "Запуск безопасного бота для очистки системных сообщений..."
     
-    def setup_handlers(self):
-        """Настройка обработчиков команд и сообщений"""
-        # Обработчик команды /start
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        
-        # Обработчик команды /help
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        
-        # Обработчик команды /status
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        
-        # Обработчик всех сообщений для проверки системных сообщений
-        self.application.add_handler(MessageHandler(filters.ALL, self.handle_message))
+    def log_kept(self, message):
+        # Логируем обычные сообщения для отладки (выборочно, по LOG_SAMPLING)
+        kept_log.info("Обычное сообщение оставлено: %.30s от %s", message.text or 'No text',
+                      message.from_user.first_name if message.from_user else 'Unknown')
+    
+    def log_deleted(self, message, message_type, reason):
+        logger.info("Удалено системное сообщение с атрибутом: %s в чате %s", message_type, message.chat.id)
+    
+    def deleted_text(self, message, message_type) -> str:
+        return f"🗑️ В чате {message.chat.title} удалено системное сообщение с атрибутом: {message_type}"
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        # /start в личном чате открывает боту личные сообщения пользователя
+        if update.effective_chat.type == 'private':
+            self.unreachable.clear(update.effective_user.id)
         welcome_text = """
 🛡️ **Безопасный бот для очистки системных сообщений**
 
@@ -115,73 +115,6 @@ class SafeSystemMessageCleanerBot:
             status_text = f"❌ Ошибка при получении статуса: {e}"
         
         await update.message.reply_text(status_text, parse_mode='Markdown')
-    
-    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик всех сообщений для удаления системных"""
-        message = update.message
-        
-        # Проверяем только системные атрибуты Telegram
-        if self.has_system_attribute(message):
-            try:
-                # Удаляем системное сообщение
-                await message.delete()
-                message_type = self.get_system_attribute_type(message)
-                logger.info(f"Удалено системное сообщение с атрибутом: {message_type} в чате {message.chat.id}")
-                
-                # Уведомляем только администраторов в личные сообщения
-                await self.notify_admins_privately(message, context, message_type)
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при удалении сообщения: {e}")
-                # Если не удалось удалить, отправляем уведомление только администраторам
-                try:
-                    await self.notify_admins_privately(message, context, error=True)
-                except:
-                    pass
-        else:
-            # Логируем обычные сообщения для отладки
-            logger.info(f"Обычное сообщение оставлено: {message.text[:30] if message.text else 'No text'} от {message.from_user.first_name if message.from_user else 'Unknown'}")
-    
-    async def notify_admins_privately(self, message, context, message_type=None, error=False):
-        """Уведомляет администраторов в личные сообщения"""
-        try:
-            admins = await message.chat.get_administrators()
-            for admin in admins:
-                if admin.user.id != context.bot.id:  # Не уведомляем самого бота
-                    try:
-                        if error:
-                            notification_text = f"⚠️ Не удалось удалить системное сообщение в чате {message.chat.title}. Проверьте права бота."
-                        else:
-                            notification_text = f"🗑️ В чате {message.chat.title} удалено системное сообщение с атрибутом: {message_type}"
-                        
-                        await context.bot.send_message(
-                            chat_id=admin.user.id,
-                            text=notification_text
-                        )
-                    except:
-                        pass  # Игнорируем ошибки отправки в личные сообщения
-        except Exception as e:
-            logger.error(f"Ошибка при уведомлении администраторов: {e}")
-    
-    def has_system_attribute(self, message) -> bool:
-        """Проверяет наличие системных атрибутов Telegram"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                logger.info(f"Найден системный атрибут: {message_type}")
-                return True
-        return False
-    
-    def get_system_attribute_type(self, message) -> str:
-        """Возвращает тип системного атрибута"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return message_type
-        return "unknown"
-    
-    def run(self):
-        """Запуск бота"""
-        logger.info("Запуск безопасного бота для очистки системных сообщений...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     bot = SafeSystemMessageCleanerBot()
@@ -0,0 +1,102 @@
+"""
+Сохранение счетчиков и настроек бота между перезапусками: значения живут в обычных словарях,
+горячий путь только меняет их в памяти, а фоновая задача раз в flush_interval секунд (и при
+остановке) записывает изменившиеся значения в SQLite (WAL) одной транзакцией
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+
+from config import BOT_STATE_DB, STATE_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Сохраняются только простые значения; остальные (например, время запуска) живут до перезапуска
+_SCALARS = (bool, int, float, str)
+
+
+class PersistentState:
+    def __init__(self, path=BOT_STATE_DB, flush_interval=STATE_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " section TEXT NOT NULL, key TEXT NOT NULL, value,"
+            " PRIMARY KEY (section, key))"
+        )
+        self._sections = {}
+        self._saved = {}
+        self._task = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def bind(self, section, values) -> dict:
+        """
+        Подставляет в values сохраненные значения известных ключей (тип берется из значения по
+        умолчанию) и дальше отслеживает словарь. Возвращает тот же словарь.
+        """
+        for key, value in self._db.execute("SELECT key, value FROM state WHERE section = ?", (section,)):
+            default = values.get(key)
+            if isinstance(default, _SCALARS) and value is not None:
+                values[key] = type(default)(value)
+        self._sections[section] = values
+        for key, value in values.items():
+            self._saved[section, key] = value
+        return values
+
+    def _changed(self) -> list:
+        return [(section, key, value)
+                for section, values in self._sections.items()
+                for key, value in values.items()
+                if isinstance(value, _SCALARS) and self._saved.get((section, key)) != value]
+
+    @property
+    def dirty(self) -> int:
+        return len(self._changed())
+
+    def flush(self) -> int:
+        """Записывает изменившиеся значения; возвращает число записанных строк"""
+        changed = self._changed()
+        if not changed:
+            return 0
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO state (section, key, value) VALUES (?, ?, ?)", changed)
+        for section, key, value in changed:
+            self._saved[section, key] = value
+        self.flushes += 1
+        self.rows_written += len(changed)
+        return len(changed)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._worker())
+
+    async def _worker(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка сохранения состояния бота: {e}")
+
+    async def close(self):
+        """Останавливает фоновую запись и сохраняет последние изменения"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+        self._db.close()
+
+    def stats(self) -> dict:
+        return {'flushes': self.flushes, 'rows_written': self.rows_written, 'dirty': self.dirty}
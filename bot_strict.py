@@ -1,36 +1,36 @@
 import logging
 from telegram import Update
-from telegram.ext import Application, MessageHandler, CommandHandler, filters, ContextTypes
-from config import BOT_TOKEN, SYSTEM_MESSAGE_TYPES
+from telegram.ext import ContextTypes
+from classifier import POLICY_STRICT
+from base_bot import BaseCleanerBot
+from logging_setup import setup_logging, sampled
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Настройка логирования (LOG_MODE, LOG_FORMAT)
+setup_logging()
 logger = logging.getLogger(__name__)
+kept_log = sampled(logger, 'kept')
 
-class StrictSystemMessageCleanerBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
-        self.setup_handlers()
+class StrictSystemMessageCleanerBot(BaseCleanerBot):
+    POLICY = POLICY_STRICT
+    MODE = 'strict'
+    STARTUP_MESSAGE = "Запуск строгого бота для очистки системных сообщений..."
     
-    def setup_handlers(self):
-        """Настройка обработчиков команд и сообщений"""
-        # Обработчик команды /start
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        
-        # Обработчик команды /help
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        
-        # Обработчик команды /status
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        
-        # Обработчик всех сообщений для проверки системных сообщений
-        self.application.add_handler(MessageHandler(filters.ALL, self.handle_message))
+    def log_kept(self, message):
+        # Логируем обычные сообщения для отладки (выборочно, по LOG_SAMPLING)
+        kept_log.info("Обычное сообщение оставлено: %.30s от %s", message.text or 'No text',
+                      message.from_user.first_name if message.from_user else 'Unknown')
+    
+    def log_deleted(self, message, message_type, reason):
+        logger.info("Удалено системное сообщение типа %s (%s): %.50s в чате %s", message_type, reason, message.text or 'No text', message.chat.id)
+    
+    def deleted_text(self, message, message_type) -> str:
+        return f"🗑️ В чате {message.chat.title} удалено системное сообщение: {message.text[:50] if message.text else 'No text'}"
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        # /start в личном чате открывает боту личные сообщения пользователя
+        if update.effective_chat.type == 'private':
+            self.unreachable.clear(update.effective_user.id)
         welcome_text = """
 🤖 **Строгий бот для очистки системных сообщений**
 
@@ -109,125 +109,6 @@ class StrictSystemMessageCleanerBot:
             status_text = f"❌ Ошибка при получении статуса: {e}"
         
         await update.message.reply_text(status_text, parse_mode='Markdown')
-    
-    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик всех сообщений для удаления системных"""
-        message = update.message
-        
-        # Строгая проверка системных сообщений
-        if self.is_strict_system_message(message, context):
-            try:
-                # Удаляем системное сообщение
-                await message.delete()
-                logger.info(f"Удалено системное сообщение: {message.text[:50] if message.text else 'No text'} в чате {message.chat.id}")
-                
-                # Уведомляем только администраторов в личные сообщения
-                await self.notify_admins_privately(message, context)
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при удалении сообщения: {e}")
-                # Если не удалось удалить, отправляем уведомление только администраторам
-                try:
-                    await self.notify_admins_privately(message, context, error=True)
-                except:
-                    pass
-        else:
-            # Логируем обычные сообщения для отладки
-            logger.info(f"Обычное сообщение оставлено: {message.text[:30] if message.text else 'No text'} от {message.from_user.first_name if message.from_user else 'Unknown'}")
-    
-    async def notify_admins_privately(self, message, context, error=False):
-        """Уведомляет администраторов в личные сообщения"""
-        try:
-            admins = await message.chat.get_administrators()
-            for admin in admins:
-                if admin.user.id != context.bot.id:  # Не уведомляем самого бота
-                    try:
-                        if error:
-                            notification_text = f"⚠️ Не удалось удалить системное сообщение в чате {message.chat.title}. Проверьте права бота."
-                        else:
-                            notification_text = f"🗑️ В чате {message.chat.title} удалено системное сообщение: {message.text[:50] if message.text else 'No text'}"
-                        
-                        await context.bot.send_message(
-                            chat_id=admin.user.id,
-                            text=notification_text
-                        )
-                    except:
-                        pass  # Игнорируем ошибки отправки в личные сообщения
-        except Exception as e:
-            logger.error(f"Ошибка при уведомлении администраторов: {e}")
-    
-    def is_strict_system_message(self, message, context) -> bool:
-        """Строгая проверка системных сообщений"""
-        
-        # 1. Проверяем системные атрибуты Telegram (самый надежный способ)
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                logger.info(f"Системное сообщение по атрибуту: {message_type}")
-                return True
-        
-        # 2. Проверяем, что сообщение НЕ от обычного пользователя
-        if message.from_user and message.from_user.id != context.bot.id:
-            # Если сообщение от пользователя - это НЕ системное сообщение
-            logger.info(f"Сообщение от пользователя - НЕ системное: {message.text[:30] if message.text else 'No text'}")
-            return False
-        
-        # 3. Проверяем текст на системные уведомления (только если НЕТ отправителя)
-        if message.text and not message.from_user:
-            # Уведомления о добавлении участников
-            add_keywords = ['добавил(а)', 'добавил', 'добавила', 'added']
-            if any(keyword in message.text for keyword in add_keywords):
-                logger.info(f"Системное сообщение по ключевому слову добавления: {message.text}")
-                return True
-            
-            # Уведомления о выходе участников
-            leave_keywords = ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']
-            if any(keyword in message.text for keyword in leave_keywords):
-                logger.info(f"Системное сообщение по ключевому слову выхода: {message.text}")
-                return True
-            
-            # Уведомления об изменениях чата
-            change_keywords = ['изменил(а) название', 'изменил название', 'изменила название', 'изменил(а) фото', 'изменил фото', 'изменила фото', 'закрепил(а)', 'закрепил', 'закрепила']
-            if any(keyword in message.text for keyword in change_keywords):
-                logger.info(f"Системное сообщение по ключевому слову изменения: {message.text}")
-                return True
-        
-        # 4. Проверяем отсутствие контента (чистые системные сообщения)
-        if message.text is None and not any([
-            message.photo, message.video, message.audio, message.document, 
-            message.voice, message.video_note, message.sticker, message.animation
-        ]):
-            logger.info("Системное сообщение без контента")
-            return True
-        
-        # 5. Если дошли до сюда - это НЕ системное сообщение
-        logger.info(f"Сообщение НЕ системное: {message.text[:30] if message.text else 'No text'}")
-        return False
-    
-    def get_message_type(self, message) -> str:
-        """Определяет тип системного сообщения"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return message_type
-        
-        # Определяем тип по содержимому
-        if message.text:
-            if any(keyword in message.text for keyword in ['добавил(а)', 'добавил', 'добавила', 'added']):
-                return 'new_chat_members'
-            elif any(keyword in message.text for keyword in ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']):
-                return 'left_chat_member'
-            elif any(keyword in message.text for keyword in ['название']):
-                return 'new_chat_title'
-            elif any(keyword in message.text for keyword in ['фото']):
-                return 'new_chat_photo'
-            elif any(keyword in message.text for keyword in ['закрепил(а)', 'закрепил', 'закрепила']):
-                return 'pinned_message'
-        
-        return "user_message"
-    
-    def run(self):
-        """Запуск бота"""
-        logger.info("Запуск строгого бота для очистки системных сообщений...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     bot = StrictSystemMessageCleanerBot()
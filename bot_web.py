@@ -1,41 +1,57 @@
+import asyncio
 import logging
-import os
-from flask import Flask, request, jsonify
+import time
+import signal
+from collections import OrderedDict
 from telegram import Update
-from telegram.ext import Application, MessageHandler, CommandHandler, filters, ContextTypes
-from config import BOT_TOKEN, SYSTEM_MESSAGE_TYPES
-
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+from telegram.ext import ContextTypes
+from config import (
+    PORT, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_INLINE_DELETE,
+    WEBHOOK_PREFILTER,
 )
+from base_bot import BaseCleanerBot
+from update_types import allowed_updates_for
+from logging_setup import setup_logging
+from webhook_server import WebhookServer
+from metrics import DELETE_SECONDS
+
+# Настройка логирования (LOG_MODE, LOG_FORMAT)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Создаем Flask приложение
-app = Flask(__name__)
-
-class SystemMessageCleanerBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
-        self.setup_handlers()
+# Сколько секунд и сколько штук хранятся отметки удалений в ответе на webhook-запрос
+INLINE_DELETE_TTL = 60
+INLINE_DELETE_MAX = 10000
+
+def update_needed(data, classifier, bot_id) -> bool:
+    """
+    Предфильтр webhook по сырому JSON: объекты PTB строятся только для обновлений, на которые
+    бот реагирует (системные сообщения, команды, chat_member и прочие не-message обновления)
+    """
+    message = data.get('message')
+    if message is None:
+        return True
+    text = message.get('text')
+    if text and text.startswith('/'):
+        return True
+    return classifier.is_system_raw(message, bot_id)
+
+class SystemMessageCleanerBot(BaseCleanerBot):
+    MODE = 'web'
+    METRICS_SERVER = False
     
-    def setup_handlers(self):
-        """Настройка обработчиков команд и сообщений"""
-        # Обработчик команды /start
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        
-        # Обработчик команды /help
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        
-        # Обработчик команды /status
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        
-        # Обработчик всех сообщений для проверки системных сообщений
-        self.application.add_handler(MessageHandler(filters.ALL, self.handle_message))
+    def __init__(self, application=None):
+        # Сообщения, удаление которых отправлено в ответе на webhook-запрос: (chat_id, message_id) -> (время, классификация).
+        # Запись забирает delete_system_message; обновления, не дошедшие до него, вытесняются по INLINE_DELETE_TTL
+        self.inline_deleted = OrderedDict()
+        self.inline_deletes = 0
+        super().__init__(application)
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        # /start в личном чате открывает боту личные сообщения пользователя
+        if update.effective_chat.type == 'private':
+            self.unreachable.clear(update.effective_user.id)
         welcome_text = """
 🤖 **Бот для очистки системных сообщений**
 
@@ -116,163 +132,87 @@ class SystemMessageCleanerBot:
         
         await update.message.reply_text(status_text, parse_mode='Markdown')
     
-    async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик всех сообщений для удаления системных"""
+    async def delete_system_message(self, update, context, message_type, reason):
+        """Удаляет системное сообщение и уведомляет администраторов"""
         message = update.message
-        
-        # Проверяем, является ли сообщение системным
-        if self.is_system_message(message):
-            try:
-                # Удаляем системное сообщение
-                await message.delete()
-                logger.info(f"Удалено системное сообщение типа {self.get_message_type(message)} в чате {message.chat.id}")
-                
-                # Уведомляем только администраторов в личные сообщения
-                await self.notify_admins_privately(message, context)
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при удалении сообщения: {e}")
-                # Если не удалось удалить, отправляем уведомление только администраторам
-                try:
-                    await self.notify_admins_privately(message, context, error=True)
-                except:
-                    pass
+        # Удаление уже отправлено Telegram в ответе на webhook-запрос (результат неизвестен)
+        if self.inline_deleted.pop((message.chat.id, message.message_id), None) is None:
+            await super().delete_system_message(update, context, message_type, reason)
+            return
+        DELETE_SECONDS.observe(0.0, message_type, 'unconfirmed')
+        logger.info("Системное сообщение типа %s (%s) в чате %s удалено по ответу на webhook, без подтверждения",
+                    message_type, reason, message.chat.id)
+        await self.background(self.notify_admins_privately(message, context, message_type, unconfirmed=True), update)
     
-    async def notify_admins_privately(self, message, context, error=False):
-        """Уведомляет администраторов в личные сообщения"""
-        try:
-            admins = await message.chat.get_administrators()
-            for admin in admins:
-                if admin.user.id != context.bot.id:  # Не уведомляем самого бота
-                    try:
-                        if error:
-                            notification_text = f"⚠️ Не удалось удалить системное сообщение в чате {message.chat.title}. Проверьте права бота."
-                        else:
-                            notification_text = f"🗑️ В чате {message.chat.title} удалено системное сообщение типа: {self.get_message_type(message)}"
-                        
-                        await context.bot.send_message(
-                            chat_id=admin.user.id,
-                            text=notification_text
-                        )
-                    except:
-                        pass  # Игнорируем ошибки отправки в личные сообщения
-        except Exception as e:
-            logger.error(f"Ошибка при уведомлении администраторов: {e}")
+    def classify(self, message, bot_id=None):
+        """Классификация сообщения; для удаленного в ответе на webhook берется уже вычисленная"""
+        inline = self.inline_deleted.get((message.chat.id, message.message_id))
+        return inline[1] if inline is not None else self.classifier.classify(message, bot_id)
     
-    def is_system_message(self, message) -> bool:
-        """Проверяет, является ли сообщение системным"""
-        # Проверяем, есть ли у сообщения системные атрибуты
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return True
-        
-        # Проверяем текст сообщения на системные уведомления
-        if message.text:
-            # Уведомления о добавлении участников
-            if any(keyword in message.text for keyword in [
-                'добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась',
-                'added', 'joined', 'присоединился к группе', 'присоединилась к группе'
-            ]):
-                return True
-            
-            # Уведомления о выходе участников
-            if any(keyword in message.text for keyword in [
-                'покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла',
-                'покинул группу', 'покинула группу', 'ушел из группы', 'ушла из группы'
-            ]):
-                return True
-            
-            # Уведомления об изменениях чата
-            if any(keyword in message.text for keyword in [
-                'изменил(а) название', 'изменил название', 'изменила название',
-                'изменил(а) фото', 'изменил фото', 'изменила фото',
-                'удалил(а) фото', 'удалил фото', 'удалила фото',
-                'закрепил(а)', 'закрепил', 'закрепила', 'pinned'
-            ]):
-                return True
-        
-        # Проверяем специальные случаи системных сообщений
-        # Системные сообщения обычно не имеют текста или имеют специальный формат
-        if message.text is None and not any([
-            message.photo, message.video, message.audio, message.document, 
-            message.voice, message.video_note, message.sticker, message.animation
-        ]):
-            # Если нет текста и нет медиа - это скорее всего системное сообщение
-            return True
-        
-        return False
+    def needs_update(self, data):
+        """Предфильтр webhook (update_needed) с классификатором и id этого бота"""
+        return update_needed(data, self.classifier, self.application.bot.id)
     
-    def get_message_type(self, message) -> str:
-        """Определяет тип системного сообщения"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return message_type
-        
-        # Определяем тип по содержимому
-        if message.text:
-            if any(keyword in message.text for keyword in ['добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась', 'added', 'joined']):
-                return 'new_chat_members'
-            elif any(keyword in message.text for keyword in ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']):
-                return 'left_chat_member'
-            elif any(keyword in message.text for keyword in ['название', 'title']):
-                return 'new_chat_title'
-            elif any(keyword in message.text for keyword in ['фото', 'photo']):
-                return 'new_chat_photo'
-            elif any(keyword in message.text for keyword in ['закрепил(а)', 'закрепил', 'закрепила', 'pinned']):
-                return 'pinned_message'
-        
-        return "unknown"
+    def inline_delete(self, update):
+        """
+        Быстрый путь webhook: для системного сообщения в чате, где права бота уже известны,
+        возвращает deleteMessage для ответа на запрос Telegram (экономит отдельный вызов API)
+        """
+        message = update.message
+        if message is None or not self.permissions.allows(message.chat.id):
+            return None
+        classification = self.classifier.classify(message, self.application.bot.id)
+        if not classification.is_system:
+            return None
+        now = time.monotonic()
+        while self.inline_deleted and (len(self.inline_deleted) >= INLINE_DELETE_MAX
+                                       or now - next(iter(self.inline_deleted.values()))[0] > INLINE_DELETE_TTL):
+            self.inline_deleted.popitem(last=False)
+        self.inline_deleted[(message.chat.id, message.message_id)] = (now, classification)
+        self.inline_deletes += 1
+        return {'method': 'deleteMessage', 'chat_id': message.chat.id, 'message_id': message.message_id}
     
-    async def start_polling(self):
-        """Запуск бота"""
-        logger.info("Запуск бота для очистки системных сообщений...")
+    async def serve(self, host='0.0.0.0', port=PORT):
+        """Запуск бота и HTTP сервера (/, /health, webhook) в одном цикле событий"""
+        logger.info(self.STARTUP_MESSAGE)
         await self.application.initialize()
+        await self.post_init(self.application)
         await self.application.start()
-        await self.application.updater.start_polling()
-
-# Создаем экземпляр бота
-bot = SystemMessageCleanerBot()
-
-# Flask маршруты
-@app.route('/')
-def home():
-    return jsonify({
-        "status": "running",
-        "bot": "Telegram System Message Cleaner",
-        "message": "Bot is running successfully!"
-    })
-
-@app.route('/health')
-def health():
-    return jsonify({"status": "healthy"})
-
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    """Webhook для Telegram (альтернативный способ)"""
-    update = Update.de_json(request.get_json(), bot.application.bot)
-    bot.application.process_update(update)
-    return jsonify({"status": "ok"})
+        allowed_updates = allowed_updates_for(self.application)
+        logger.info(f"allowed_updates: {', '.join(allowed_updates)}")
+        server = WebhookServer(self.application, inline_action=self.inline_delete if WEBHOOK_INLINE_DELETE else None,
+                               prefilter=self.needs_update if WEBHOOK_PREFILTER else None)
+        await server.start(host, port)
+        if WEBHOOK_URL:
+            # Telegram сам доставляет обновления на WEBHOOK_URL + WEBHOOK_PATH
+            await self.application.bot.set_webhook(WEBHOOK_URL + WEBHOOK_PATH, allowed_updates=allowed_updates,
+                                                   secret_token=WEBHOOK_SECRET)
+            logger.info(f"Режим webhook: {WEBHOOK_URL}{WEBHOOK_PATH}")
+        else:
+            await self.application.updater.start_polling(allowed_updates=allowed_updates)
+        
+        # Работаем до SIGINT/SIGTERM (Render и Railway останавливают сервис через SIGTERM)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: остановка через KeyboardInterrupt
+        try:
+            await stop.wait()
+        finally:
+            await server.stop()
+            if self.application.updater.running:
+                await self.application.updater.stop()
+            await self.application.stop()
+            await self.post_stop(self.application)
+            await self.application.shutdown()
 
 # Запуск приложения
 if __name__ == "__main__":
-    import asyncio
-    
-    # Запускаем бота в фоновом режиме
-    async def run_bot():
-        await bot.start_polling()
-    
-    # Запускаем Flask сервер
-    def run_flask():
-        port = int(os.environ.get('PORT', 10000))
-        app.run(host='0.0.0.0', port=port, debug=False)
-    
-    # Запускаем оба сервиса
-    import threading
-    
-    # Запускаем бота в отдельном потоке
-    bot_thread = threading.Thread(target=lambda: asyncio.run(run_bot()))
-    bot_thread.daemon = True
-    bot_thread.start()
-    
-    # Запускаем Flask сервер
-    run_flask() 
\ No newline at end of file
+    bot = SystemMessageCleanerBot()
+    try:
+        asyncio.run(bot.serve())
+    except KeyboardInterrupt:
+        pass
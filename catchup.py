@@ -0,0 +1,115 @@
+"""
+Догоняющий режим: после простоя бот получает накопившиеся обновления. Системные сообщения
+старше CATCHUP_AGE секунд удаляются пакетами без уведомления на каждое; когда очередь
+разобрана, администраторы каждого чата получают одну сводку, и бот возвращается в обычный режим
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from config import CATCHUP_AGE, CATCHUP_IDLE
+from notifications import KIND_DELETED, format_counts
+
+logger = logging.getLogger(__name__)
+
+
+class CatchUpTracker:
+    def __init__(self, bot, outbound, admin_cache, unreachable, age=CATCHUP_AGE, idle=CATCHUP_IDLE):
+        self.bot = bot
+        self.outbound = outbound
+        self.admin_cache = admin_cache
+        self.unreachable = unreachable
+        self.age = age
+        self.idle = idle
+        self.active = False
+        self._chats = {}  # chat_id -> [чат, Counter((вид, тип))]
+        self._started = 0.0
+        self._processed = 0
+        self._timer = None
+        self._tasks = set()
+        self.drains = 0
+        self.drained = 0
+
+    def is_backlog(self, message) -> bool:
+        """Сообщение из накопившейся очереди (отправлено раньше, чем age секунд назад)"""
+        return time.time() - message.date.timestamp() > self.age
+
+    def observe(self, message):
+        """Отмечает обработку системного сообщения: включает и завершает догоняющий режим"""
+        if not self.is_backlog(message):
+            if self.active:
+                self._finish()
+            return
+        if not self.active:
+            self.active = True
+            self._started = time.monotonic()
+            self._processed = 0
+            logger.info(f"Обнаружена очередь обновлений старше {self.age} с: догоняющий режим")
+        self._processed += 1
+        # Очередь считается разобранной, если старые сообщения перестали приходить
+        self._arm(self._finish)
+
+    def add(self, chat, message_type, kind=KIND_DELETED):
+        """Учитывает событие в сводке чата вместо отдельного уведомления"""
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [chat, Counter()]
+        entry[1][(kind, message_type or 'unknown')] += 1
+        # Удаление, завершившееся после выхода из режима, попадет в дополнительную сводку
+        if not self.active and self._timer is None:
+            self._arm(self._flush)
+
+    def _arm(self, callback):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.idle, callback)
+
+    def _finish(self):
+        if not self.active:
+            return
+        self.active = False
+        elapsed = time.monotonic() - self._started
+        self.drains += 1
+        self.drained += self._processed
+        rate = self._processed / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Очередь разобрана: {self._processed} системных сообщений за {elapsed:.1f} с "
+                    f"({rate:.0f} сообщ/с), обычный режим")
+        # Сводки уходят с задержкой: удаления последних сообщений очереди еще могут выполняться
+        self._arm(self._flush)
+
+    def _flush(self):
+        self._timer = None
+        if not self._chats:
+            return
+        task = asyncio.get_running_loop().create_task(self.send_summaries())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def send_summaries(self):
+        """Отправляет администраторам каждого чата одну сводку по разобранной очереди"""
+        chats, self._chats = self._chats, {}
+        await asyncio.gather(*(self._send_summary(chat, counts) for chat, counts in chats.values()))
+
+    async def _send_summary(self, chat, counts):
+        text = "\n".join([f"📋 Чат {chat.title}: пока бот был недоступен, накопились системные сообщения"]
+                         + format_counts(counts))
+        try:
+            admins = await self.admin_cache.get_administrators(chat)
+            admin_ids = self.unreachable.reachable([admin.user.id for admin in admins if admin.user.id != self.bot.id])
+            self.unreachable.record(await self.outbound.send_to_many(self.bot, admin_ids, text))
+        except Exception as e:
+            logger.error(f"Ошибка при отправке сводки догоняющего режима в чат {chat.id}: {e}")
+
+    async def close(self):
+        """Завершает догоняющий режим при остановке бота и дожидается отправки сводок"""
+        self._finish()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {'active': self.active, 'drains': self.drains, 'drained': self.drained}
@@ -0,0 +1,130 @@
+"""
+Настройки advanced_bot.py по чатам: флаги и политика классификатора упакованы в одно целое число.
+В базе и в памяти хранятся только чаты, где настройки меняли; остальные чаты используют общие
+настройки по умолчанию. id чатов со своими настройками читаются при запуске, поэтому чаты с
+настройками по умолчанию не обращаются к базе; флаги остальных подгружаются из SQLite при первом
+обращении и вытесняются из памяти по LRU.
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+
+from classifier import POLICIES, POLICY_DEFAULT
+from config import BOT_STATE_DB, CHAT_SETTINGS_CACHE_SIZE
+
+AUTO_DELETE = 1
+LOG_DELETIONS = 2
+NOTIFY_ADMINS = 4
+FLAGS = {'auto_delete': AUTO_DELETE, 'log_deletions': LOG_DELETIONS, 'notify_admins': NOTIFY_ADMINS}
+
+# Политика - номер в POLICIES, биты 3-4
+_POLICY_SHIFT = 3
+_POLICY_MASK = 3 << _POLICY_SHIFT
+
+
+def pack(settings, policy=POLICY_DEFAULT) -> int:
+    """Словарь настроек и политика -> флаги"""
+    flags = POLICIES.index(policy) << _POLICY_SHIFT
+    for name, bit in FLAGS.items():
+        if settings.get(name):
+            flags |= bit
+    return flags
+
+
+def policy_of(flags) -> str:
+    return POLICIES[(flags & _POLICY_MASK) >> _POLICY_SHIFT]
+
+
+class ChatSettings:
+    """
+    defaults - общий словарь настроек (auto_delete, log_deletions, notify_admins): его изменения
+    сразу действуют во всех чатах без своих настроек. В кэше LRU лежат флаги чатов со своими
+    настройками; чат без них определяется по множеству id и в кэш не попадает.
+    """
+
+    def __init__(self, defaults, path=BOT_STATE_DB, max_size=CHAT_SETTINGS_CACHE_SIZE, policy=POLICY_DEFAULT):
+        self.defaults = defaults
+        self.policy = policy
+        self.max_size = max_size
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chat_settings (chat_id INTEGER PRIMARY KEY, flags INTEGER NOT NULL)"
+        )
+        self._entries = OrderedDict()  # chat_id -> флаги или None
+        # Чаты со своими настройками: для остальных флаги не ищутся в базе
+        self._customized = {row[0] for row in self._db.execute("SELECT chat_id FROM chat_settings")}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def default_flags(self) -> int:
+        return pack(self.defaults, self.policy)
+
+    def own_flags(self, chat_id):
+        """Флаги чата, если их меняли, иначе None"""
+        try:
+            flags = self._entries[chat_id]
+        except KeyError:
+            self.misses += 1
+            if chat_id not in self._customized:
+                return None
+            row = self._db.execute("SELECT flags FROM chat_settings WHERE chat_id = ?", (chat_id,)).fetchone()
+            flags = row[0] if row else None
+            self._store(chat_id, flags)
+            return flags
+        self._entries.move_to_end(chat_id)
+        self.hits += 1
+        return flags
+
+    def flags(self, chat_id) -> int:
+        flags = self.own_flags(chat_id)
+        return self.default_flags() if flags is None else flags
+
+    def enabled(self, chat_id, name) -> bool:
+        return bool(self.flags(chat_id) & FLAGS[name])
+
+    def policy_for(self, chat_id) -> str:
+        return policy_of(self.flags(chat_id))
+
+    def _store(self, chat_id, flags):
+        self._entries[chat_id] = flags
+        self._entries.move_to_end(chat_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_flags(self, chat_id, flags):
+        """Сохраняет настройки чата (изменения редки, поэтому запись сразу)"""
+        self._db.execute("INSERT OR REPLACE INTO chat_settings (chat_id, flags) VALUES (?, ?)", (chat_id, flags))
+        self._customized.add(chat_id)
+        self._store(chat_id, flags)
+
+    def toggle(self, chat_id, name) -> bool:
+        """Переключает флаг чата; возвращает новое значение"""
+        flags = self.flags(chat_id) ^ FLAGS[name]
+        self.set_flags(chat_id, flags)
+        return bool(flags & FLAGS[name])
+
+    def cycle_policy(self, chat_id) -> str:
+        """Следующая политика классификатора для чата"""
+        flags = self.flags(chat_id)
+        policy = POLICIES[(POLICIES.index(policy_of(flags)) + 1) % len(POLICIES)]
+        self.set_flags(chat_id, (flags & ~_POLICY_MASK) | (POLICIES.index(policy) << _POLICY_SHIFT))
+        return policy
+
+    def reset(self, chat_id):
+        """Возвращает чату настройки по умолчанию"""
+        self._db.execute("DELETE FROM chat_settings WHERE chat_id = ?", (chat_id,))
+        self._customized.discard(chat_id)
+        self._entries.pop(chat_id, None)
+
+    def close(self):
+        self._db.close()
+
+    def stats(self) -> dict:
+        return {'cached': len(self._entries), 'customized': len(self._customized), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
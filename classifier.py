@@ -0,0 +1,131 @@
+"""
+Общий классификатор системных сообщений для всех вариантов бота
+"""
+
+from collections import namedtuple
+from operator import attrgetter
+
+from telegram import Message
+
+from config import SYSTEM_MESSAGE_TYPES, KEYWORD_LANGUAGES
+from keyword_matcher import KeywordMatcher
+
+# Политики классификации
+POLICY_DEFAULT = 'default'  # атрибуты + ключевые слова + сообщения без контента (bot.py, advanced_bot.py, bot_web.py, debug_bot.py)
+POLICY_STRICT = 'strict'    # как default, но сообщения от пользователей никогда не считаются системными (bot_strict.py)
+POLICY_SAFE = 'safe'        # только системные атрибуты Telegram (bot_safe.py)
+POLICIES = (POLICY_DEFAULT, POLICY_STRICT, POLICY_SAFE)
+
+# Причины решения
+REASON_ATTRIBUTE = 'attribute'
+REASON_KEYWORD = 'keyword'
+REASON_NO_CONTENT = 'no_content'
+REASON_USER = 'user_message'
+REASON_NONE = 'none'
+
+Classification = namedtuple('Classification', ['is_system', 'message_type', 'reason'])
+
+# Тип системного сообщения для каждой категории ключевых слов
+CATEGORY_TYPES = {
+    'join': 'new_chat_members',
+    'leave': 'left_chat_member',
+    'chat_title': 'new_chat_title',
+    'chat_photo': 'new_chat_photo',
+    'chat_photo_deleted': 'delete_chat_photo',
+    'pin': 'pinned_message',
+}
+
+KEYWORD_MATCHER = KeywordMatcher.from_languages(KEYWORD_LANGUAGES)
+
+# Атрибуты пользовательского контента. Сервисные сообщения Telegram никогда не содержат
+# текста или медиа, поэтому при их наличии перебор системных атрибутов не нужен.
+CONTENT_ATTRIBUTES = ('text', 'photo', 'video', 'audio', 'document', 'voice', 'video_note', 'sticker', 'animation')
+
+# Системные атрибуты, которые есть в установленной версии python-telegram-bot.
+# Значения по умолчанию у PTB бывают пустыми, а не None (new_chat_members == (),
+# delete_chat_photo == False), поэтому наличие атрибута проверяется по истинности.
+SYSTEM_ATTRIBUTES = tuple(name for name in SYSTEM_MESSAGE_TYPES if hasattr(Message, name))
+SYSTEM_ATTRIBUTE_SET = frozenset(SYSTEM_ATTRIBUTES)
+
+# Те же атрибуты как ключи JSON сообщения (для решения по сырому обновлению без объектов PTB)
+CONTENT_KEYS = frozenset(CONTENT_ATTRIBUTES)
+
+_get_system_values = attrgetter(*SYSTEM_ATTRIBUTES)
+_get_content_values = attrgetter(*CONTENT_ATTRIBUTES)
+
+_NOT_SYSTEM = Classification(False, None, REASON_NONE)
+_USER_MESSAGE = Classification(False, None, REASON_USER)
+_NO_CONTENT = Classification(True, 'unknown', REASON_NO_CONTENT)
+_BY_ATTRIBUTE = {name: Classification(True, name, REASON_ATTRIBUTE) for name in SYSTEM_ATTRIBUTES}
+_BY_KEYWORD = {category: Classification(True, message_type, REASON_KEYWORD) for category, message_type in CATEGORY_TYPES.items()}
+
+
+def find_system_attribute(message):
+    """Возвращает первый установленный системный атрибут сообщения или None"""
+    values = _get_system_values(message)
+    if not any(values):
+        return None
+    for name, value in zip(SYSTEM_ATTRIBUTES, values):
+        if value:
+            return name
+    return None
+
+
+class MessageClassifier:
+    def __init__(self, policy=POLICY_DEFAULT):
+        if policy not in POLICIES:
+            raise ValueError(f"Неизвестная политика классификации: {policy}")
+        self.policy = policy
+
+    def classify(self, message, bot_id=None) -> Classification:
+        """Определяет за один проход, является ли сообщение системным, его тип и причину"""
+        if any(_get_content_values(message)):
+            # Обычный контент: системным может оказаться только текстовое уведомление
+            if self.policy == POLICY_SAFE:
+                return _NOT_SYSTEM
+            from_user = message.from_user
+            if self.policy == POLICY_STRICT and from_user and from_user.id != bot_id:
+                return _USER_MESSAGE
+            text = message.text
+            if text and (self.policy == POLICY_DEFAULT or not from_user):
+                category = KEYWORD_MATCHER.match(text)
+                if category is not None:
+                    return _BY_KEYWORD[category]
+            return _NOT_SYSTEM
+
+        attribute = find_system_attribute(message)
+        if attribute is not None:
+            return _BY_ATTRIBUTE[attribute]
+
+        if self.policy == POLICY_SAFE:
+            return _NOT_SYSTEM
+        from_user = message.from_user
+        if self.policy == POLICY_STRICT and from_user and from_user.id != bot_id:
+            return _USER_MESSAGE
+        if message.text is None:
+            # Нет ни текста, ни медиа, ни известного атрибута - скорее всего системное сообщение
+            return _NO_CONTENT
+        return _NOT_SYSTEM
+
+    def is_system_raw(self, data, bot_id=None) -> bool:
+        """То же решение, что classify(), по словарю сообщения из JSON обновления (без объектов PTB)"""
+        # Telegram не передает пустые поля, поэтому наличие ключа равносильно истинности атрибута
+        if not CONTENT_KEYS.isdisjoint(data):
+            if self.policy == POLICY_SAFE:
+                return False
+            from_user = data.get('from')
+            if self.policy == POLICY_STRICT and from_user and from_user.get('id') != bot_id:
+                return False
+            text = data.get('text')
+            if text and (self.policy == POLICY_DEFAULT or not from_user):
+                return KEYWORD_MATCHER.match(text) is not None
+            return False
+
+        if not SYSTEM_ATTRIBUTE_SET.isdisjoint(data):
+            return True
+        if self.policy == POLICY_SAFE:
+            return False
+        from_user = data.get('from')
+        if self.policy == POLICY_STRICT and from_user and from_user.get('id') != bot_id:
+            return False
+        return True
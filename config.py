@@ -1,4 +1,5 @@
 import os
+import secrets
 from dotenv import load_dotenv
 
 # Загружаем переменные окружения
@@ -42,4 +43,136 @@ SYSTEM_MESSAGE_TYPES = [
     'video_chat_ended',
     'video_chat_participants_invited',
     'web_app_data'
-] 
\ No newline at end of file
+]
+
+# Языки наборов ключевых слов для текстовых системных уведомлений (файлы keywords/<язык>.json)
+KEYWORD_LANGUAGES = [language.strip() for language in os.getenv('KEYWORD_LANGUAGES', 'ru,en').split(',') if language.strip()]
+
+# Режим фильтра: системные сообщения отбираются фильтрами PTB, обычные сообщения не доходят до обработчика
+FILTER_MODE = os.getenv('FILTER_MODE', 'true').lower() in ('1', 'true', 'yes')
+
+# Кэш списков администраторов: время жизни записи (секунды) и максимальное число чатов
+ADMIN_CACHE_TTL = int(os.getenv('ADMIN_CACHE_TTL', '300'))
+ADMIN_CACHE_SIZE = int(os.getenv('ADMIN_CACHE_SIZE', '10000'))
+# Сброс кэша по chat_member: Telegram присылает обновление на каждый вход/выход участника, поэтому по умолчанию
+# кэш сбрасывается только по my_chat_member и по истечении ADMIN_CACHE_TTL
+ADMIN_CACHE_CHAT_MEMBER = os.getenv('ADMIN_CACHE_CHAT_MEMBER', 'false').lower() in ('1', 'true', 'yes')
+
+# Уведомления администраторов: 'immediate' - сообщение на каждое удаление, 'digest' - сводка за окно DIGEST_WINDOW секунд
+NOTIFY_MODE = os.getenv('NOTIFY_MODE', 'immediate').lower()
+DIGEST_WINDOW = int(os.getenv('DIGEST_WINDOW', '300'))
+
+# Планировщик исходящих вызовов Bot API: лимиты Telegram (сообщений/с глобально, в личный чат, в группу за минуту),
+# число одновременных запросов и число повторов после RetryAfter
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', '30'))
+OUTBOUND_PRIVATE_RATE = float(os.getenv('OUTBOUND_PRIVATE_RATE', '1'))
+OUTBOUND_GROUP_RATE_PER_MIN = float(os.getenv('OUTBOUND_GROUP_RATE_PER_MIN', '20'))
+OUTBOUND_CONCURRENCY = int(os.getenv('OUTBOUND_CONCURRENCY', '8'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '5'))
+
+# HTTP клиент Bot API (http_pool.py): пул соединений исходящих вызовов, сколько из них держать открытыми
+# (keep-alive) и сколько секунд, HTTP/2 (нужен пакет h2), таймауты (секунды; HTTP_POOL_TIMEOUT - ожидание
+# свободного соединения). getUpdates использует отдельный пул, чтобы долгий опрос не занимал соединения удалений
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_KEEPALIVE_CONNECTIONS', str(HTTP_POOL_SIZE)))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP2 = os.getenv('HTTP2', 'false').lower() in ('1', 'true', 'yes')
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '5'))
+HTTP_WRITE_TIMEOUT = float(os.getenv('HTTP_WRITE_TIMEOUT', '5'))
+HTTP_POOL_TIMEOUT = float(os.getenv('HTTP_POOL_TIMEOUT', '1'))
+GET_UPDATES_POOL_SIZE = int(os.getenv('GET_UPDATES_POOL_SIZE', '1'))
+GET_UPDATES_READ_TIMEOUT = float(os.getenv('GET_UPDATES_READ_TIMEOUT', '5'))
+
+# Параллельная обработка обновлений: сколько обновлений разных чатов обрабатывается одновременно
+# (обновления одного чата всегда идут по очереди); 1 - строго последовательная обработка
+UPDATE_CONCURRENCY = max(1, int(os.getenv('UPDATE_CONCURRENCY', '32')))
+
+# Каталог для файлов состояния бота
+DATA_DIR = os.getenv('DATA_DIR', 'data')
+# Номер рабочего процесса в шардированном режиме (sharding.py): у каждого процесса свои файлы состояния
+SHARD_INDEX = os.getenv('SHARD_INDEX')
+if SHARD_INDEX is not None:
+    DATA_DIR = os.path.join(DATA_DIR, f'shard-{SHARD_INDEX}')
+# Администраторы, получившие 403 на личное сообщение; сохраняются между перезапусками
+UNREACHABLE_ADMINS_FILE = os.getenv('UNREACHABLE_ADMINS_FILE', os.path.join(DATA_DIR, 'unreachable_admins.json'))
+
+# Пакетное удаление: до DELETE_BATCH_SIZE id в одном deleteMessages (лимит Bot API - 100),
+# пакет чата отправляется не позже чем через DELETE_BATCH_DELAY секунд после первого сообщения
+DELETE_BATCH_SIZE = min(100, int(os.getenv('DELETE_BATCH_SIZE', '100')))
+DELETE_BATCH_DELAY = float(os.getenv('DELETE_BATCH_DELAY', '0.2'))
+
+# Очередь повторного удаления после временных ошибок: файл SQLite, начальная и максимальная задержка
+# (секунды) и возраст сообщения, после которого Telegram уже не дает его удалить (48 часов)
+DELETE_RETRY_DB = os.getenv('DELETE_RETRY_DB', os.path.join(DATA_DIR, 'delete_retry.sqlite3'))
+DELETE_RETRY_BASE_DELAY = float(os.getenv('DELETE_RETRY_BASE_DELAY', '2'))
+DELETE_RETRY_MAX_DELAY = float(os.getenv('DELETE_RETRY_MAX_DELAY', '600'))
+DELETE_RETRY_MAX_AGE = float(os.getenv('DELETE_RETRY_MAX_AGE', str(48 * 3600)))
+
+# Счетчики и настройки advanced_bot.py: файл SQLite и период фоновой записи изменений (секунды; по нему же пишется UNREACHABLE_ADMINS_FILE)
+BOT_STATE_DB = os.getenv('BOT_STATE_DB', os.path.join(DATA_DIR, 'bot_state.sqlite3'))
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', '10'))
+# Сколько чатов держать в памяти с их настройками (остальные подгружаются из BOT_STATE_DB при обращении)
+CHAT_SETTINGS_CACHE_SIZE = int(os.getenv('CHAT_SETTINGS_CACHE_SIZE', '10000'))
+# id владельцев бота через запятую: только они меняют настройки по умолчанию (в личном чате с
+# advanced_bot.py) и сбрасывают общую статистику
+BOT_OWNERS = frozenset(int(user_id) for user_id in os.getenv('BOT_OWNERS', '').split(',') if user_id.strip())
+
+# Журнал удалений (audit_log.py): файл кольцевого буфера и сколько последних записей в нем хранится
+AUDIT_LOG_FILE = os.getenv('AUDIT_LOG_FILE', os.path.join(DATA_DIR, 'deletions.log'))
+AUDIT_LOG_SIZE = int(os.getenv('AUDIT_LOG_SIZE', '100000'))
+# Сколько чатов держать в скользящих счетчиках /stats (минута/час/сутки); давно не встречавшиеся вытесняются
+WINDOW_STATS_CHATS = int(os.getenv('WINDOW_STATS_CHATS', '2000'))
+
+# Кэш прав бота по чатам (секунды) и минимальный интервал между уведомлениями об отсутствии прав в одном чате
+BOT_RIGHTS_TTL = int(os.getenv('BOT_RIGHTS_TTL', '3600'))
+RIGHTS_NOTICE_INTERVAL = int(os.getenv('RIGHTS_NOTICE_INTERVAL', '3600'))
+
+# Догоняющий режим: системные сообщения старше CATCHUP_AGE секунд считаются накопившимися за простой
+# (удаляются без уведомления на каждое, в конце - сводка); режим завершается, когда старые сообщения
+# не приходят CATCHUP_IDLE секунд
+CATCHUP_AGE = int(os.getenv('CATCHUP_AGE', '60'))
+CATCHUP_IDLE = float(os.getenv('CATCHUP_IDLE', '5'))
+
+# HTTP сервер bot_web.py: порт (Render/Railway передают его в PORT), внешний адрес для webhook
+# (пусто - обновления получаются через getUpdates), путь и секрет webhook, предел очереди обновлений.
+# Секрет проверяется всегда: если он не задан, при запуске генерируется случайный и передается в set_webhook
+PORT = int(os.getenv('PORT', '10000'))
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or secrets.token_urlsafe(32)
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+# Удаление системного сообщения прямо в ответе на webhook-запрос (без отдельного вызова deleteMessage).
+# Результат такого вызова Telegram не сообщает, поэтому быстрый путь включается явно
+WEBHOOK_INLINE_DELETE = os.getenv('WEBHOOK_INLINE_DELETE', 'false').lower() in ('1', 'true', 'yes')
+# Предфильтр webhook: обновления без действий для бота (обычные сообщения) отбрасываются по сырому JSON,
+# без построения объектов PTB
+WEBHOOK_PREFILTER = os.getenv('WEBHOOK_PREFILTER', 'true').lower() in ('1', 'true', 'yes')
+
+# Порт HTTP сервера /metrics и /health для ботов в режиме getUpdates (0 - не запускать);
+# bot_web.py отдает /metrics на основном порту PORT
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Профилирование (profiling.py): замер времени обработчиков (полного и процессорного) и
+# сэмплирующий профилировщик, который включают командой /profile пользователи из PROFILE_ADMINS.
+# Стеки сохраняются в PROFILE_DIR в свернутом формате (flamegraph.pl, speedscope)
+PROFILING = os.getenv('PROFILING', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_ADMINS = frozenset(int(user_id) for user_id in os.getenv('PROFILE_ADMINS', '').split(',') if user_id.strip())
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '300'))
+
+# Логирование (logging_setup.py): LOG_MODE=sync - запись прямо из цикла событий, queue - записи
+# форматируются и пишутся в фоновом потоке; LOG_FORMAT=text|json. LOG_SAMPLING - частые строки по категориям
+# в виде "категория=доля/строк в секунду" (kept - оставленные обычные сообщения)
+LOG_MODE = os.getenv('LOG_MODE', 'sync').lower()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', 'kept=0.01/5')
+
+# Шардированный режим (sharding.py): число рабочих процессов, между которыми приемник webhook
+# распределяет обновления по chat_id; сколько секунд ждать подключения рабочего процесса (при запуске
+# и после перезапуска упавшего процесса)
+SHARD_WORKERS = max(1, int(os.getenv('SHARD_WORKERS', '2')))
+SHARD_START_TIMEOUT = float(os.getenv('SHARD_START_TIMEOUT', '60'))
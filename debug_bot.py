@@ -1,7 +1,14 @@
 import logging
 from telegram import Update
-from telegram.ext import Application, MessageHandler, CommandHandler, filters, ContextTypes
-from config import BOT_TOKEN, SYSTEM_MESSAGE_TYPES
+from telegram.ext import MessageHandler, CommandHandler, ChatMemberHandler, filters, ContextTypes
+from config import NOTIFY_MODE
+from classifier import MessageClassifier, POLICY_DEFAULT, SYSTEM_ATTRIBUTES
+from admin_cache import AdminCache, ADMIN_CHAT_MEMBER_TYPES
+from outbound import OutboundScheduler
+from notifications import NotificationDigest, KIND_ANALYZED
+from unreachable import UnreachableAdmins
+from update_types import allowed_updates_for
+from http_pool import build_application
 
 # Настройка логирования
 logging.basicConfig(
@@ -11,26 +18,39 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class DebugSystemMessageCleanerBot:
-    def __init__(self):
-        self.application = Application.builder().token(BOT_TOKEN).build()
+    def __init__(self, application=None):
+        # application можно передать готовым (например, с локальным BaseRequest в бенчмарках)
+        self.application = application or build_application()
+        self.classifier = MessageClassifier(POLICY_DEFAULT)
+        self.admin_cache = AdminCache()
+        self.outbound = OutboundScheduler()
+        self.unreachable = UnreachableAdmins()
+        self.digest = NotificationDigest(self.application.bot, self.outbound, unreachable=self.unreachable) if NOTIFY_MODE == 'digest' else None
+        self.application.post_stop = self.post_stop
         self.setup_handlers()
     
     def setup_handlers(self):
         """Настройка обработчиков команд и сообщений"""
         # Обработчик команды /start
-        self.application.add_handler(CommandHandler("start", self.start_command))
+        self.application.add_handler(CommandHandler("start", self.start_command, filters=filters.UpdateType.MESSAGE))
         
         # Обработчик команды /help
-        self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("help", self.help_command, filters=filters.UpdateType.MESSAGE))
         
         # Обработчик команды /status
-        self.application.add_handler(CommandHandler("status", self.status_command))
+        self.application.add_handler(CommandHandler("status", self.status_command, filters=filters.UpdateType.MESSAGE))
+        
+        # Сброс кэша администраторов при назначении/снятии администраторов (chat_member - только по ADMIN_CACHE_CHAT_MEMBER)
+        self.application.add_handler(ChatMemberHandler(self.admin_cache.handle_chat_member_update, ADMIN_CHAT_MEMBER_TYPES))
         
         # Обработчик всех сообщений для проверки системных сообщений
         self.application.add_handler(MessageHandler(filters.ALL, self.handle_message))
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        # /start в личном чате открывает боту личные сообщения пользователя
+        if update.effective_chat.type == 'private':
+            self.unreachable.clear(update.effective_user.id)
         welcome_text = """
 🔍 **Отладочный бот для очистки системных сообщений**
 
@@ -103,8 +123,8 @@ class DebugSystemMessageCleanerBot:
         message = update.message
         
         # Анализируем сообщение
-        is_system = self.is_system_message(message)
-        message_type = self.get_message_type(message)
+        is_system, message_type, reason = self.classifier.classify(message, context.bot.id)
+        message_type = message_type or 'user_message'
         
         # Создаем отладочную информацию
         debug_info = f"""
@@ -114,14 +134,15 @@ class DebugSystemMessageCleanerBot:
 **Текст:** {message.text[:100] + '...' if message.text and len(message.text) > 100 else message.text or 'Нет текста'}
 **Тип:** {message_type}
 **Системное:** {'✅ Да' if is_system else '❌ Нет'}
+**Причина:** `{reason}`
 
 **Атрибуты сообщения:**
 """
         
         # Проверяем системные атрибуты
-        for attr in SYSTEM_MESSAGE_TYPES:
-            value = getattr(message, attr, None)
-            if value is not None:
+        for attr in SYSTEM_ATTRIBUTES:
+            value = getattr(message, attr)
+            if value:
                 debug_info += f"• {attr}: ✅ {value}\n"
         
         # Проверяем наличие контента
@@ -140,88 +161,39 @@ class DebugSystemMessageCleanerBot:
         
         # Отправляем отладочную информацию только администраторам
         try:
-            admins = await message.chat.get_administrators()
-            for admin in admins:
-                if admin.user.id != context.bot.id:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=admin.user.id,
-                            text=debug_info,
-                            parse_mode='Markdown'
-                        )
-                    except:
-                        pass
+            admins = await self.admin_cache.get_administrators(message.chat)
+            admin_ids = [admin.user.id for admin in admins if admin.user.id != context.bot.id]
+            # Администраторы, которым бот не может писать, пропускаются без запроса к API
+            admin_ids = self.unreachable.reachable(admin_ids)
+            if self.digest is not None:
+                # Режим сводки: вместо отчета на каждое сообщение - счетчики по типам за окно
+                for admin_id in admin_ids:
+                    self.digest.add(admin_id, message.chat, message_type, KIND_ANALYZED)
+                return
+            # Отправка идет в фоне, чтобы лимиты личных чатов не задерживали обработку следующих обновлений
+            self.application.create_task(self.send_report(context.bot, admin_ids, debug_info), update=update)
         except Exception as e:
             logger.error(f"Ошибка при отправке отладочной информации: {e}")
     
-    def is_system_message(self, message) -> bool:
-        """Проверяет, является ли сообщение системным"""
-        # Проверяем, есть ли у сообщения системные атрибуты
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return True
-        
-        # Проверяем текст сообщения на системные уведомления
-        if message.text:
-            # Уведомления о добавлении участников
-            if any(keyword in message.text for keyword in [
-                'добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась',
-                'added', 'joined', 'присоединился к группе', 'присоединилась к группе'
-            ]):
-                return True
-            
-            # Уведомления о выходе участников
-            if any(keyword in message.text for keyword in [
-                'покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла',
-                'покинул группу', 'покинула группу', 'ушел из группы', 'ушла из группы'
-            ]):
-                return True
-            
-            # Уведомления об изменениях чата
-            if any(keyword in message.text for keyword in [
-                'изменил(а) название', 'изменил название', 'изменила название',
-                'изменил(а) фото', 'изменил фото', 'изменила фото',
-                'удалил(а) фото', 'удалил фото', 'удалила фото',
-                'закрепил(а)', 'закрепил', 'закрепила', 'pinned'
-            ]):
-                return True
-        
-        # Проверяем специальные случаи системных сообщений
-        # Системные сообщения обычно не имеют текста или имеют специальный формат
-        if message.text is None and not any([
-            message.photo, message.video, message.audio, message.document, 
-            message.voice, message.video_note, message.sticker, message.animation
-        ]):
-            # Если нет текста и нет медиа - это скорее всего системное сообщение
-            return True
-        
-        return False
+    async def send_report(self, bot, admin_ids, text):
+        """Рассылает отладочный отчет и запоминает администраторов, недоступных для личных сообщений"""
+        results = await self.outbound.send_to_many(bot, admin_ids, text, parse_mode='Markdown')
+        self.unreachable.record(results)
     
-    def get_message_type(self, message) -> str:
-        """Определяет тип системного сообщения"""
-        for message_type in SYSTEM_MESSAGE_TYPES:
-            if hasattr(message, message_type) and getattr(message, message_type) is not None:
-                return message_type
-        
-        # Определяем тип по содержимому
-        if message.text:
-            if any(keyword in message.text for keyword in ['добавил(а)', 'добавил', 'добавила', 'присоединился', 'присоединилась', 'added', 'joined']):
-                return 'new_chat_members'
-            elif any(keyword in message.text for keyword in ['покинул(а)', 'покинул', 'покинула', 'left', 'ушел', 'ушла']):
-                return 'left_chat_member'
-            elif any(keyword in message.text for keyword in ['название', 'title']):
-                return 'new_chat_title'
-            elif any(keyword in message.text for keyword in ['фото', 'photo']):
-                return 'new_chat_photo'
-            elif any(keyword in message.text for keyword in ['закрепил(а)', 'закрепил', 'закрепила', 'pinned']):
-                return 'pinned_message'
-        
-        return "user_message"
+    async def post_stop(self, application):
+        """Отправляет накопленные сводки и очередь исходящих вызовов при остановке бота"""
+        if self.digest is not None:
+            await self.digest.close()
+        await self.outbound.close()
+        await self.unreachable.close()
     
     def run(self):
         """Запуск бота"""
         logger.info("Запуск отладочного бота для очистки системных сообщений...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+        # Запрашиваем у Telegram только те обновления, которые нужны зарегистрированным обработчикам
+        allowed_updates = allowed_updates_for(self.application)
+        logger.info(f"allowed_updates: {', '.join(allowed_updates)}")
+        self.application.run_polling(allowed_updates=allowed_updates)
 
 if __name__ == "__main__":
     bot = DebugSystemMessageCleanerBot()
@@ -0,0 +1,118 @@
+"""
+Пакетное удаление сообщений: id системных сообщений одного чата копятся и удаляются
+одним вызовом deleteMessages (до 100 id) вместо deleteMessage на каждое сообщение
+"""
+
+import asyncio
+import logging
+from functools import partial
+
+from config import DELETE_BATCH_SIZE, DELETE_BATCH_DELAY
+from outbound import PRIORITY_DELETE
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionBatcher:
+    """
+    Пакет чата отправляется, когда в нем набралось max_batch id или прошло delay секунд
+    с первого id. Если deleteMessages завершился ошибкой, сообщения пакета удаляются по
+    одному, чтобы каждое получило свой результат.
+    deleteMessages молча пропускает id, которые удалить нельзя, и все равно возвращает True,
+    поэтому удаление в пакете не подтверждено: такие сообщения учитываются в unconfirmed.
+    """
+
+    def __init__(self, bot, outbound, max_batch=DELETE_BATCH_SIZE, delay=DELETE_BATCH_DELAY):
+        self.bot = bot
+        self.outbound = outbound
+        self.max_batch = max_batch
+        self.delay = delay
+        self._pending = {}  # chat_id -> (id сообщений, future, таймер)
+        self._tasks = set()
+        self.messages = 0
+        self.api_calls = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.deleted = 0
+        self.failed = 0
+        self.unconfirmed = 0
+
+    async def delete(self, chat_id, message_id):
+        """
+        Ставит сообщение в пакет чата и ждет результат его удаления (ошибка - исключением):
+        True - удаление подтвердил deleteMessage, False - сообщение удалено в пакете deleteMessages без подтверждения
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(chat_id)
+        if batch is None:
+            batch = self._pending[chat_id] = ([], [], loop.call_later(self.delay, self._flush, chat_id))
+        batch[0].append(message_id)
+        batch[1].append(future)
+        self.messages += 1
+        if len(batch[0]) >= self.max_batch:
+            self._flush(chat_id)
+        return await future
+
+    def _flush(self, chat_id):
+        batch = self._pending.pop(chat_id, None)
+        if batch is None:
+            return
+        message_ids, futures, timer = batch
+        timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._send(chat_id, message_ids, futures))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _submit(self, chat_id, call):
+        self.api_calls += 1
+        return self.outbound.submit(chat_id, call, PRIORITY_DELETE, rate_limited=False)
+
+    async def _send(self, chat_id, message_ids, futures):
+        if len(message_ids) == 1:
+            results = await asyncio.gather(self._submit(chat_id, partial(self.bot.delete_message, chat_id, message_ids[0])),
+                                           return_exceptions=True)
+        else:
+            self.batches += 1
+            try:
+                await self._submit(chat_id, partial(self.bot.delete_messages, chat_id, message_ids))
+                results = [False] * len(message_ids)
+                self.unconfirmed += len(message_ids)
+            except Exception as e:
+                # deleteMessages не сообщает, какое сообщение не удалось удалить: повторяем по одному
+                self.fallbacks += 1
+                logger.warning(f"deleteMessages для {len(message_ids)} сообщений в чате {chat_id} не выполнен ({e}), удаляем по одному")
+                results = await asyncio.gather(
+                    *(self._submit(chat_id, partial(self.bot.delete_message, chat_id, message_id)) for message_id in message_ids),
+                    return_exceptions=True,
+                )
+        for future, result in zip(futures, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(result)
+            else:
+                self.deleted += 1
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Отправляет накопленные пакеты и дожидается их удаления (при остановке бота)"""
+        for chat_id in list(self._pending):
+            self._flush(chat_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Счетчики пакетного удаления"""
+        return {
+            'queued': sum(len(batch[0]) for batch in self._pending.values()),
+            'messages': self.messages,
+            'api_calls': self.api_calls,
+            'batches': self.batches,
+            'fallbacks': self.fallbacks,
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'unconfirmed': self.unconfirmed,
+            'saved_calls': max(0, self.deleted + self.failed - self.api_calls),
+        }
@@ -0,0 +1,119 @@
+"""
+HTTP клиент Bot API: отдельные пулы соединений для getUpdates и исходящих вызовов с настройками
+из config.py и учет загрузки пулов (для подбора HTTP_POOL_SIZE под нагрузку); сборка Application
+"""
+
+import logging
+import time
+
+import httpx
+from telegram.error import TimedOut
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+
+try:
+    # HTTP/2 (необязательная зависимость: pip install "python-telegram-bot[http2]")
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from config import (
+    BOT_TOKEN, HTTP_POOL_SIZE, HTTP_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY, HTTP2,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_WRITE_TIMEOUT, HTTP_POOL_TIMEOUT,
+    GET_UPDATES_POOL_SIZE, GET_UPDATES_READ_TIMEOUT, UPDATE_CONCURRENCY,
+)
+from metrics import GET_UPDATES_BATCH
+from update_processor import ChatOrderedProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolRequest(HTTPXRequest):
+    """
+    HTTPXRequest с явными лимитами keep-alive и учетом занятости пула: запросы в работе (текущее и
+    пиковое число), запросы, начатые при занятых соединениях (ждут свободное), таймауты пула и
+    средняя загрузка - доля времени, когда соединения пула заняты запросами
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, keepalive_connections=HTTP_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry=HTTP_KEEPALIVE_EXPIRY, http2=HTTP2, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                 read_timeout=HTTP_READ_TIMEOUT, write_timeout=HTTP_WRITE_TIMEOUT, pool_timeout=HTTP_POOL_TIMEOUT):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2 включен, но пакет h2 не установлен: используется HTTP/1.1")
+            http2 = False
+        limits = httpx.Limits(max_connections=pool_size,
+                              max_keepalive_connections=min(keepalive_connections, pool_size),
+                              keepalive_expiry=keepalive_expiry)
+        super().__init__(connection_pool_size=pool_size, connect_timeout=connect_timeout, read_timeout=read_timeout,
+                         write_timeout=write_timeout, pool_timeout=pool_timeout,
+                         http_version='2' if http2 else '1.1', httpx_kwargs={'limits': limits})
+        self.pool_size = pool_size
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self.waits = 0
+        self.pool_timeouts = 0
+        self._busy = 0.0
+        self._started = time.monotonic()
+
+    async def do_request(self, *args, **kwargs):
+        if self.in_flight >= self.pool_size:
+            self.waits += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.requests += 1
+        started = time.monotonic()
+        try:
+            return await super().do_request(*args, **kwargs)
+        except TimedOut as e:
+            if isinstance(e.__cause__, httpx.PoolTimeout):
+                self.pool_timeouts += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._busy += time.monotonic() - started
+
+    async def post(self, url, *args, **kwargs):
+        result = await super().post(url, *args, **kwargs)
+        if url.endswith('/getUpdates'):
+            GET_UPDATES_BATCH.observe(len(result))
+        return result
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            'pool_size': self.pool_size,
+            'http_version': self.http_version,
+            'in_flight': self.in_flight,
+            'peak': self.peak,
+            'requests': self.requests,
+            'waits': self.waits,
+            'pool_timeouts': self.pool_timeouts,
+            'utilization': round(min(1.0, self._busy / (elapsed * self.pool_size)), 3),
+        }
+
+
+def build_application(token=BOT_TOKEN, concurrency=UPDATE_CONCURRENCY):
+    """
+    Application с пулами соединений из config.py (исходящие вызовы и getUpdates не делят соединения)
+    и параллельной обработкой разных чатов
+    """
+    builder = (
+        Application.builder()
+        .token(token)
+        .request(PoolRequest())
+        .get_updates_request(PoolRequest(GET_UPDATES_POOL_SIZE, GET_UPDATES_POOL_SIZE, http2=False,
+                                         read_timeout=GET_UPDATES_READ_TIMEOUT))
+    )
+    if concurrency > 1:
+        builder.concurrent_updates(ChatOrderedProcessor(concurrency))
+    return builder.build()
+
+
+def pool_stats(application) -> dict:
+    """Загрузка пулов приложения по назначению (только пулы PoolRequest)"""
+    # Bot хранит пары (getUpdates, остальные вызовы); публично доступен только второй
+    get_updates_request, request = application.bot._request
+    return {name: r.stats() for name, r in (('outgoing', request), ('get_updates', get_updates_request))
+            if isinstance(r, PoolRequest)}
@@ -0,0 +1,92 @@
+"""
+Многошаблонный поиск ключевых слов системных уведомлений за один проход по тексту
+"""
+
+import json
+import os
+import re
+
+KEYWORDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keywords')
+
+# Категории в порядке приоритета: при нескольких совпадениях побеждает более ранняя.
+# chat_title, chat_photo и chat_photo_deleted - изменения чата.
+CATEGORIES = ('join', 'leave', 'chat_title', 'chat_photo', 'chat_photo_deleted', 'pin')
+_PRIORITY = {category: index for index, category in enumerate(CATEGORIES)}
+
+
+def load_keyword_packs(languages, directory=KEYWORDS_DIR):
+    """Загружает и объединяет наборы ключевых слов для указанных языков"""
+    packs = {category: [] for category in CATEGORIES}
+    for language in languages:
+        path = os.path.join(directory, f"{language}.json")
+        if not os.path.exists(path):
+            raise ValueError(f"Не найден набор ключевых слов для языка '{language}': {path}")
+        with open(path, encoding='utf-8') as f:
+            pack = json.load(f)
+        for category, keywords in pack.items():
+            if category not in packs:
+                raise ValueError(f"Неизвестная категория '{category}' в {path}")
+            packs[category].extend(keywords)
+    return packs
+
+
+def _trie_pattern(node):
+    """Строит регулярное выражение из префиксного дерева (общие префиксы сливаются)"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    # '' в узле: ключевое слово заканчивается здесь, но есть и более длинные продолжения
+    optional = '?' if '' in node else ''
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')' + optional
+
+
+class KeywordMatcher:
+    """
+    Автомат по всем ключевым словам, собранный один раз: префиксное дерево компилируется
+    в одно регулярное выражение, и текст просматривается движком re за один проход
+    вместо отдельного поиска каждого слова.
+    """
+
+    def __init__(self, packs):
+        self.categories = {}
+        trie = {}
+        for category, keywords in packs.items():
+            if category not in _PRIORITY:
+                raise ValueError(f"Неизвестная категория ключевых слов: {category}")
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                # Слово, попавшее в несколько категорий, относится к более приоритетной
+                existing = self.categories.get(keyword)
+                if existing is None or _PRIORITY[category] < _PRIORITY[existing]:
+                    self.categories[keyword] = category
+                node = trie
+                for char in keyword:
+                    node = node.setdefault(char, {})
+                node[''] = {}
+        self._pattern = re.compile(_trie_pattern(trie)) if self.categories else None
+
+    @classmethod
+    def from_languages(cls, languages, directory=KEYWORDS_DIR):
+        return cls(load_keyword_packs(languages, directory))
+
+    def scan(self, text):
+        """Возвращает множество всех категорий, найденных в тексте"""
+        if self._pattern is None:
+            return set()
+        return {self.categories[match.group()] for match in self._pattern.finditer(text)}
+
+    def match(self, text):
+        """Возвращает самую приоритетную найденную категорию или None"""
+        if self._pattern is None:
+            return None
+        best = None
+        for found in self._pattern.finditer(text):
+            priority = _PRIORITY[self.categories[found.group()]]
+            if priority == 0:
+                return CATEGORIES[0]
+            if best is None or priority < best:
+                best = priority
+        return None if best is None else CATEGORIES[best]
@@ -0,0 +1,174 @@
+"""
+Настройка логирования ботов вместо logging.basicConfig.
+
+LOG_MODE=sync (по умолчанию): запись прямо из цикла событий, как раньше. LOG_MODE=queue: в цикле
+событий запись только кладется в очередь (QueueHandler), а сообщение собирается из аргументов и
+пишется в фоновом потоке (QueueListener). Поэтому строки логов передают аргументы %-форматом, а не
+f-строкой. При переполнении очереди отбрасываются только записи ниже WARNING (их число - в /stats и
+метрике cleaner_log_dropped_total); предупреждения и ошибки тогда пишутся напрямую.
+LOG_FORMAT=json: одна JSON-строка на запись.
+
+Частые строки (например, об оставленных обычных сообщениях) пишутся через sampled(): доля строк
+и предел строк в секунду по категориям из LOG_SAMPLING; пропущенные строки не создают LogRecord.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+from config import LOG_MODE, LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLING
+from metrics import LOG_DROPPED
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        category = getattr(record, 'category', None)
+        if category is not None:
+            entry['category'] = category
+            entry['skipped'] = record.skipped
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Очередь записей без форматирования в вызывающем потоке. При переполнении записи ниже WARNING
+    отбрасываются, а более важные передаются output сразу, в вызывающем потоке.
+    """
+
+    def __init__(self, records, output, max_size=LOG_QUEUE_SIZE):
+        super().__init__(records)
+        self.output = output
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Сообщение соберет QueueListener: аргументы записи не должны меняться после вызова логгера
+        return record
+
+    def enqueue(self, record):
+        # SimpleQueue без блокировок Python заметно дешевле queue.Queue; предел проверяется по qsize
+        if self.queue.qsize() >= self.max_size:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                LOG_DROPPED.inc()
+                return
+            self.output.handle(record)
+            return
+        self.queue.put_nowait(record)
+
+
+def setup_logging(stream=None, mode=LOG_MODE, log_format=LOG_FORMAT, level=LOG_LEVEL, force=False):
+    """
+    Настраивает корневой логгер (stream - по умолчанию stderr). Как logging.basicConfig, ничего не
+    делает, если логирование уже настроено, пока не передан force=True.
+    """
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+    if mode == 'queue':
+        handler = _queue_handler = LazyQueueHandler(queue.SimpleQueue(), output)
+        _listener = logging.handlers.QueueListener(handler.queue, output)
+        _listener.start()
+    else:
+        _queue_handler = None
+        handler = output
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def dropped_records() -> int:
+    """Сколько записей ниже WARNING отброшено из-за переполнения очереди (LOG_MODE=queue)"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def stop_logging():
+    """Дописывает накопленные в очереди записи и останавливает фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def _parse_sampling(value) -> dict:
+    """"kept=0.01/5,deleted=1/50" -> {'kept': (0.01, 5), 'deleted': (1.0, 50)}"""
+    result = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        category, _, limits = item.partition('=')
+        sample, _, rate = limits.partition('/')
+        result[category.strip()] = (float(sample or 1), int(rate or 0))
+    return result
+
+
+SAMPLING = _parse_sampling(LOG_SAMPLING)
+
+
+class SampledLogger:
+    """
+    Строки одной категории: пишется каждая round(1/sample)-я строка (sample=0 - ни одной) и не
+    больше rate строк в секунду (0 - без предела). В записи - категория и число пропущенных строк.
+    """
+
+    def __init__(self, logger, category, sample=1.0, rate=0):
+        self.logger = logger
+        self.category = category
+        self.every = max(1, round(1 / sample)) if sample > 0 else 0
+        self.rate = rate
+        self.seen = 0
+        self.skipped = 0
+        self._second = 0
+        self._written = 0
+
+    def _allow(self) -> bool:
+        self.seen += 1
+        if not self.every or self.seen % self.every:
+            self.skipped += 1
+            return False
+        if self.rate:
+            second = int(time.monotonic())
+            if second != self._second:
+                self._second = second
+                self._written = 0
+            if self._written >= self.rate:
+                self.skipped += 1
+                return False
+            self._written += 1
+        return True
+
+    def info(self, msg, *args):
+        if self.logger.isEnabledFor(logging.INFO) and self._allow():
+            self.logger.info(msg, *args, extra={'category': self.category, 'skipped': self.skipped})
+            self.skipped = 0
+
+
+def sampled(logger, category) -> SampledLogger:
+    """Логгер категории с долей и пределом из LOG_SAMPLING (по умолчанию - все строки)"""
+    sample, rate = SAMPLING.get(category, (1.0, 0))
+    return SampledLogger(logger, category, sample, rate)
@@ -0,0 +1,161 @@
+"""
+Метрики в текстовом формате Prometheus (/metrics): счетчики, гистограммы и измеряемые при
+запросе значения. Без внешних зависимостей; обновление метрики - несколько операций со словарем,
+текст собирается только при запросе /metrics.
+"""
+
+import bisect
+import logging
+
+from config import METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограмм задержек, секунды
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Классификация занимает микросекунды
+FAST_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3)
+BATCH_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # Общие метки всех метрик процесса (режим бота)
+        self.const_labels = {}
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        const = tuple(self.const_labels.items())
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples(const))
+            except Exception as e:
+                logger.error(f"Ошибка вычисления метрики {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        registry.register(self)
+
+    def inc(self, *label_values, amount=1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self, const):
+        for label_values, value in self._values.items():
+            yield f"{self.name}{_labels(self.labels, label_values, const)} {value}"
+
+
+class Gauge:
+    """Значение вычисляется при запросе: функции по наборам меток (set_function)"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._functions = {}
+        registry.register(self)
+
+    def set_function(self, function, *label_values):
+        self._functions[label_values] = function
+
+    def samples(self, const):
+        for label_values, function in self._functions.items():
+            yield f"{self.name}{_labels(self.labels, label_values, const)} {function()}"
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._values = {}  # метки -> [счетчики по корзинам (+Inf последней), сумма, количество]
+        registry.register(self)
+
+    def observe(self, value, *label_values):
+        entry = self._values.get(label_values)
+        if entry is None:
+            entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self, const):
+        for label_values, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, const + (('le', bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values, const)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, label_values, const)} {count}"
+
+
+CLASSIFY_SECONDS = Histogram('cleaner_classify_seconds', "Время классификации сообщения (тип none - не системное)", ('message_type',),
+                             buckets=FAST_BUCKETS)
+DELETE_SECONDS = Histogram('cleaner_delete_seconds', "Задержка delete() (включая ожидание пакета deleteMessages)",
+                           ('message_type', 'result'))
+ADMINS_SECONDS = Histogram('cleaner_get_administrators_seconds', "Время получения списка администраторов",
+                           ('cache',))
+OUTBOUND_CALLS = Counter('cleaner_outbound_calls_total', "Вызовы Bot API через планировщик (удаления и уведомления)",
+                         ('kind', 'result'))
+GET_UPDATES_BATCH = Histogram('cleaner_get_updates_batch_size', "Обновлений в ответе getUpdates", (),
+                              buckets=BATCH_BUCKETS)
+# Заполняется только при PROFILING=true (profiling.py)
+HANDLER_SECONDS = Histogram('cleaner_handler_seconds', "Время обработчиков: полное (wall) и процессорное (cpu)",
+                            ('handler', 'clock'))
+LOG_DROPPED = Counter('cleaner_log_dropped_total', "Записи логов ниже WARNING, отброшенные при переполнении очереди",
+                      ())
+QUEUE_DEPTH = Gauge('cleaner_queue_depth', "Глубина очередей: обновлений и исходящих вызовов", ('queue',))
+
+
+def set_mode(mode):
+    """Режим бота (bot, advanced, safe, strict, web) - метка mode у всех метрик процесса"""
+    REGISTRY.const_labels['mode'] = mode
+
+
+def watch_queues(application, outbound):
+    """Глубина очереди обновлений (вместе с процессором) и очереди исходящих вызовов для /metrics"""
+    processor = application.update_processor
+    QUEUE_DEPTH.set_function(lambda: application.update_queue.qsize() + getattr(processor, 'queue_depth', 0), 'updates')
+    QUEUE_DEPTH.set_function(lambda: outbound.queue_depth, 'outbound')
+
+
+async def start_metrics_server(application, port=METRICS_PORT, host='0.0.0.0'):
+    """HTTP сервер /metrics и /health в цикле событий бота (режим getUpdates); None, если порт не задан"""
+    if not port:
+        return None
+    from webhook_server import WebhookServer
+
+    server = WebhookServer(application, path=None)
+    await server.start(host, port)
+    return server
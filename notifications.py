@@ -0,0 +1,106 @@
+"""
+Сводки уведомлений администраторам: вместо личного сообщения на каждое удаление
+события копятся по паре (администратор, чат) и отправляются одной сводкой за окно
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from functools import partial
+
+from config import DIGEST_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Виды событий в сводке
+KIND_DELETED = 'deleted'
+KIND_FAILED = 'failed'
+KIND_ANALYZED = 'analyzed'
+# Удаление отправлено в пакете deleteMessages или в ответе на webhook-запрос: Telegram не сообщает его результат
+KIND_UNCONFIRMED = 'unconfirmed'
+
+_KIND_TITLES = (
+    (KIND_DELETED, "🗑️ Удалено"),
+    (KIND_UNCONFIRMED, "🗑️ Удалено без подтверждения (deleteMessages или ответ на webhook)"),
+    (KIND_FAILED, "⚠️ Не удалось удалить (проверьте права бота)"),
+    (KIND_ANALYZED, "🔍 Проанализировано"),
+)
+
+
+def format_counts(counts) -> list:
+    """Строки сводки по видам событий: Counter((вид, тип)) -> ['🗑️ Удалено: 3 new_chat_members, ...']"""
+    lines = []
+    for kind, title in _KIND_TITLES:
+        items = sorted(((count, message_type) for (item_kind, message_type), count in counts.items() if item_kind == kind),
+                       reverse=True)
+        if items:
+            lines.append(f"{title}: " + ", ".join(f"{count} {message_type}" for count, message_type in items))
+    return lines
+
+
+class NotificationDigest:
+    def __init__(self, bot, outbound, window=DIGEST_WINDOW, unreachable=None):
+        self.bot = bot
+        self.outbound = outbound
+        self.unreachable = unreachable
+        self.window = window
+        self._buffers = {}  # (admin_id, chat_id) -> [название чата, Counter((вид, тип))]
+        self._task = None
+        self._flushing = None
+        self.events = 0
+        self.sent = 0
+
+    def add(self, admin_id, chat, message_type, kind=KIND_DELETED):
+        """Добавляет событие в сводку администратора по чату"""
+        self._counts(admin_id, chat.id, chat.title)[(kind, message_type or 'unknown')] += 1
+        self.events += 1
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def _counts(self, admin_id, chat_id, chat_title) -> Counter:
+        key = (admin_id, chat_id)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = [chat_title, Counter()]
+        return buffer[1]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.window)
+            self._flushing = asyncio.ensure_future(self.flush())
+            # Остановка не прерывает начатую отправку: close дождется ее
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    def format_summary(self, chat_title, counts) -> str:
+        """Текст сводки по одному чату"""
+        period = f"{round(self.window / 60)} мин" if self.window >= 60 else f"{self.window} с"
+        return "\n".join([f"📋 Чат {chat_title}, последние {period}:"] + format_counts(counts))
+
+    async def flush(self):
+        """Отправляет все накопленные сводки"""
+        for key in list(self._buffers):
+            admin_id = key[0]
+            chat_title, counts = self._buffers.pop(key)
+            try:
+                await self.outbound.submit(admin_id, partial(
+                    self.bot.send_message, chat_id=admin_id, text=self.format_summary(chat_title, counts)))
+                self.sent += 1
+            except asyncio.CancelledError:
+                # Сводка не отправлена: события возвращаются в буфер (к пришедшим за время отправки)
+                self._counts(admin_id, key[1], chat_title).update(counts)
+                raise
+            except Exception as e:
+                logger.debug(f"Не удалось отправить сводку администратору {admin_id}: {e}")
+                if self.unreachable is not None:
+                    self.unreachable.record([(admin_id, e)])
+
+    async def close(self):
+        """Останавливает периодическую отправку и отправляет остаток (при остановке бота)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+        await self.flush()
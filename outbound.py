@@ -0,0 +1,276 @@
+"""
+Общий планировщик исходящих вызовов Bot API: глобальный и поштучный по чатам лимиты
+(token bucket), ограниченный параллелизм, приоритет удалений над уведомлениями и
+обработка RetryAfter паузой вместо потери сообщения
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from functools import partial
+
+from telegram.error import RetryAfter
+
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_PRIVATE_RATE, OUTBOUND_GROUP_RATE_PER_MIN,
+    OUTBOUND_CONCURRENCY, OUTBOUND_MAX_RETRIES,
+)
+from metrics import OUTBOUND_CALLS
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты (меньше - важнее)
+PRIORITY_DELETE = 0
+PRIORITY_NOTIFY = 1
+# Метка kind метрики вызовов по приоритету
+_KINDS = {PRIORITY_DELETE: 'delete', PRIORITY_NOTIFY: 'notify'}
+
+# Неиспользуемые корзины чатов чистятся, когда их становится больше этого числа
+_MAX_IDLE_BUCKETS = 10000
+
+
+def retry_after_seconds(error) -> float:
+    """Длительность паузы из RetryAfter (int в PTB 21, timedelta в более новых версиях)"""
+    value = error.retry_after
+    return value.total_seconds() if hasattr(value, 'total_seconds') else float(value)
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now, need_token=True) -> float:
+        """Сколько секунд ждать до возможности отправки (0 - можно сейчас)"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if not need_token:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds, now):
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0
+        self.updated = max(self.updated, self.paused_until)
+
+    def idle(self, now) -> bool:
+        self._refill(now)
+        return now >= self.paused_until and self.tokens >= self.capacity
+
+
+class OutboundScheduler:
+    def __init__(self, global_rate=OUTBOUND_GLOBAL_RATE, private_rate=OUTBOUND_PRIVATE_RATE,
+                 group_rate_per_min=OUTBOUND_GROUP_RATE_PER_MIN, concurrency=OUTBOUND_CONCURRENCY,
+                 max_retries=OUTBOUND_MAX_RETRIES):
+        self.private_rate = private_rate
+        self.group_rate = group_rate_per_min / 60
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate)
+        self._chats = {}
+        # Очереди задач по чатам: куча [приоритет, порядковый номер, chat_id, вызов, лимит по чату, future, попытка]
+        self._queues = {}
+        # Чаты с задачами: готовые к отправке [приоритет, номер первой задачи, chat_id, версия] и
+        # ждущие лимита чата [время готовности, chat_id, версия]. Запись с устаревшей версией пропускается
+        self._ready = []
+        self._waiting = []
+        self._versions = {}
+        self._size = 0
+        self._seq = itertools.count()
+        self._running = 0
+        self._wakeup = None
+        self._dispatcher = None
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._size
+
+    def stats(self) -> dict:
+        return {'queue_depth': self._size, 'running': self._running, 'sent': self.sent,
+                'failed': self.failed, 'retry_after': self.retries}
+
+    async def submit(self, chat_id, call, priority=PRIORITY_NOTIFY, rate_limited=True):
+        """
+        Ставит вызов в очередь и ждет результат. call - функция без аргументов, возвращающая
+        корутину вызова Bot API; rate_limited=False отключает лимит чата (паузы RetryAfter соблюдаются).
+        """
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        future = loop.create_future()
+        self._enqueue([priority, next(self._seq), chat_id, call, rate_limited, future, 0])
+        self._wakeup.set()
+        return await future
+
+    async def send_to_many(self, bot, chat_ids, text, **kwargs):
+        """Параллельно отправляет сообщение в несколько чатов; возвращает список (chat_id, ошибка или None)"""
+        results = await asyncio.gather(
+            *(self.submit(chat_id, partial(bot.send_message, chat_id=chat_id, text=text, **kwargs)) for chat_id in chat_ids),
+            return_exceptions=True,
+        )
+        outcome = []
+        for chat_id, result in zip(chat_ids, results):
+            error = result if isinstance(result, Exception) else None
+            if error is not None:
+                logger.debug(f"Не удалось отправить сообщение в чат {chat_id}: {error}")
+            outcome.append((chat_id, error))
+        return outcome
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                self._chats = {key: value for key, value in self._chats.items() if not value.idle(now)}
+            # Личные чаты имеют положительный id, группы и каналы - отрицательный
+            bucket = TokenBucket(self.private_rate if chat_id > 0 else self.group_rate, capacity=1)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _enqueue(self, job):
+        queue = self._queues.get(job[2])
+        if queue is None:
+            queue = self._queues[job[2]] = []
+        heapq.heappush(queue, job)
+        self._size += 1
+        if queue[0] is job:
+            # Новая первая задача чата: чат перепланируется с ее приоритетом
+            self._schedule(job[2], time.monotonic())
+
+    def _schedule(self, chat_id, now):
+        """Ставит чат в кучу готовых или ждущих по его первой задаче (прежние записи чата устаревают)"""
+        version = self._versions.get(chat_id, 0) + 1
+        self._versions[chat_id] = version
+        head = self._queues[chat_id][0]
+        wait = self._chat_bucket(chat_id).wait_time(now, need_token=head[4])
+        if wait == 0:
+            heapq.heappush(self._ready, [head[0], head[1], chat_id, version])
+        else:
+            heapq.heappush(self._waiting, [now + wait, chat_id, version])
+
+    def _pick(self, now):
+        """
+        Достает самую приоритетную задачу, готовую к отправке, или возвращает время ожидания.
+        Стоимость - O(log числа чатов): задачи чатов, ждущих лимита, не просматриваются.
+        """
+        wait = self._global.wait_time(now)
+        if wait > 0:
+            return None, wait
+        while self._waiting and self._waiting[0][0] <= now:
+            _, chat_id, version = heapq.heappop(self._waiting)
+            if self._versions.get(chat_id) == version:
+                self._schedule(chat_id, now)
+        while self._ready:
+            _, _, chat_id, version = heapq.heappop(self._ready)
+            if self._versions.get(chat_id) != version:
+                continue
+            queue = self._queues[chat_id]
+            job = queue[0]
+            bucket = self._chat_bucket(chat_id)
+            if bucket.wait_time(now, need_token=job[4]) > 0:
+                # Чат поставлен на паузу (RetryAfter) после попадания в готовые
+                self._schedule(chat_id, now)
+                continue
+            heapq.heappop(queue)
+            self._size -= 1
+            self._global.take(now)
+            if job[4]:
+                bucket.take(now)
+            if queue:
+                self._schedule(chat_id, now)
+            else:
+                del self._queues[chat_id]
+                del self._versions[chat_id]
+            return job, 0.0
+        return None, (self._waiting[0][0] - now if self._waiting else None)
+
+    async def _dispatch(self):
+        while True:
+            if not self._size or self._running >= self.concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job, wait = self._pick(time.monotonic())
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._running += 1
+            asyncio.get_running_loop().create_task(self._run(job))
+
+    async def _run(self, job):
+        future = job[5]
+        try:
+            result = await job[3]()
+        except RetryAfter as e:
+            # Telegram просит подождать: ставим чат на паузу и возвращаем задачу в очередь
+            self.retries += 1
+            seconds = retry_after_seconds(e)
+            now = time.monotonic()
+            self._chat_bucket(job[2]).pause(seconds, now)
+            logger.warning(f"RetryAfter {seconds:.0f} с для чата {job[2]}")
+            if job[6] < self.max_retries and not future.done():
+                job[6] += 1
+                self._enqueue(job)
+                # Остальные задачи чата тоже ждут окончания паузы
+                self._schedule(job[2], now)
+            elif not future.done():
+                self.failed += 1
+                OUTBOUND_CALLS.inc(_KINDS[job[0]], 'retry_after')
+                future.set_exception(e)
+        except Exception as e:
+            self.failed += 1
+            OUTBOUND_CALLS.inc(_KINDS[job[0]], 'error')
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.sent += 1
+            OUTBOUND_CALLS.inc(_KINDS[job[0]], 'ok')
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._running -= 1
+            self._wakeup.set()
+
+    async def close(self, timeout=5.0):
+        """Дожидается отправки очереди (не дольше timeout) и останавливает планировщик"""
+        if self._dispatcher is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._size or self._running) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._dispatcher.cancel()
+        self._dispatcher = None
+        for queue in self._queues.values():
+            for job in queue:
+                if not job[5].done():
+                    job[5].cancel()
+        self._queues.clear()
+        self._versions.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        self._size = 0
@@ -0,0 +1,110 @@
+"""
+Кэш прав бота по чатам: может ли бот удалять сообщения. Заполняется из my_chat_member
+и лениво через get_member, чтобы не вызывать deleteMessage в чатах без прав
+"""
+
+import asyncio
+import logging
+import time
+
+from telegram import Chat, ChatMember
+
+from config import BOT_RIGHTS_TTL, RIGHTS_NOTICE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def can_delete_messages(member) -> bool:
+    """Есть ли у участника (бота) право удалять чужие сообщения"""
+    if member.status == ChatMember.OWNER:
+        return True
+    return member.status == ChatMember.ADMINISTRATOR and bool(member.can_delete_messages)
+
+
+class BotPermissionCache:
+    def __init__(self, ttl=BOT_RIGHTS_TTL, notice_interval=RIGHTS_NOTICE_INTERVAL):
+        self.ttl = ttl
+        self.notice_interval = notice_interval
+        self._rights = {}    # chat_id -> (истекает в, может удалять)
+        self._pending = {}   # chat_id -> задача текущего запроса get_member
+        self._notices = {}   # chat_id -> время последнего уведомления об отсутствии прав
+        self.lookups = 0
+        self.skipped = 0
+        self.notices = 0
+        self.suppressed_notices = 0
+
+    def set(self, chat_id, can_delete):
+        self._rights[chat_id] = (time.monotonic() + self.ttl, can_delete)
+        if can_delete:
+            self._notices.pop(chat_id, None)
+
+    def invalidate(self, chat_id):
+        """Сбрасывает запись чата: права будут запрошены заново"""
+        self._rights.pop(chat_id, None)
+
+    def allows(self, chat_id) -> bool:
+        """Известно ли без запросов к API, что бот может удалять сообщения в чате"""
+        entry = self._rights.get(chat_id)
+        return entry is not None and entry[1] and entry[0] > time.monotonic()
+
+    async def can_delete(self, chat, bot_id) -> bool:
+        """Может ли бот удалять сообщения в чате; при отрицательном ответе учитывает пропуск"""
+        if chat.type == Chat.PRIVATE:
+            return True
+        entry = self._rights.get(chat.id)
+        if entry is None or entry[0] <= time.monotonic():
+            allowed = await self._lookup(chat, bot_id)
+        else:
+            allowed = entry[1]
+        if not allowed:
+            self.skipped += 1
+        return allowed
+
+    async def _lookup(self, chat, bot_id) -> bool:
+        # Одновременные сообщения одного чата ждут один и тот же запрос
+        pending = self._pending.get(chat.id)
+        if pending is None:
+            self.lookups += 1
+            pending = self._pending[chat.id] = asyncio.ensure_future(chat.get_member(bot_id))
+        try:
+            member = await pending
+        except Exception as e:
+            # Права неизвестны: пробуем удалить, ошибка удаления обработается как обычно
+            logger.debug(f"Не удалось проверить права бота в чате {chat.id}: {e}")
+            return True
+        finally:
+            if self._pending.get(chat.id) is pending:
+                del self._pending[chat.id]
+        allowed = can_delete_messages(member)
+        self.set(chat.id, allowed)
+        return allowed
+
+    def should_notify(self, chat_id) -> bool:
+        """Разрешает одно уведомление об отсутствии прав на чат за notice_interval секунд"""
+        now = time.monotonic()
+        last = self._notices.get(chat_id)
+        if last is not None and now - last < self.notice_interval:
+            self.suppressed_notices += 1
+            return False
+        self._notices[chat_id] = now
+        self.notices += 1
+        return True
+
+    async def handle_my_chat_member(self, update, context):
+        """Обработчик my_chat_member: права бота изменились - обновляем запись чата"""
+        member_update = update.my_chat_member
+        if member_update is None:
+            return
+        allowed = can_delete_messages(member_update.new_chat_member)
+        self.set(member_update.chat.id, allowed)
+        logger.info(f"Права бота в чате {member_update.chat.id}: удаление {'разрешено' if allowed else 'запрещено'}")
+
+    def stats(self) -> dict:
+        """Счетчики кэша прав"""
+        return {
+            'chats': len(self._rights),
+            'lookups': self.lookups,
+            'skipped': self.skipped,
+            'notices': self.notices,
+            'suppressed_notices': self.suppressed_notices,
+        }
@@ -0,0 +1,230 @@
+"""
+Профилирование бота (включается PROFILING=true): обработчики PTB и notify_admins_privately
+оборачиваются замером полного и процессорного времени, а команда /profile запускает и
+останавливает сэмплирующий профилировщик. Профилировщик - фоновый поток, который раз в
+PROFILE_INTERVAL секунд снимает стек потока цикла событий; результат - файл со свернутыми стеками
+("функция;функция;... число") для flamegraph.pl или speedscope.
+
+Разница полного и процессорного времени обработчика - время ожидания (Bot API, очереди,
+блокировки); процессорное время считается только на шагах самой корутины.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes, filters
+
+from config import PROFILING, PROFILE_ADMINS, PROFILE_DIR, PROFILE_INTERVAL, PROFILE_MAX_SECONDS
+from metrics import HANDLER_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class _Measured:
+    """Ожидание корутины с подсчетом процессорного времени ее шагов (без времени других задач)"""
+    __slots__ = ('coro', 'cpu')
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.cpu = 0.0
+
+    def __await__(self):
+        coro = self.coro
+        value = None
+        error = None
+        while True:
+            started = time.thread_time()
+            try:
+                future = coro.send(value) if error is None else coro.throw(error)
+            except StopIteration as e:
+                self.cpu += time.thread_time() - started
+                return e.value
+            except BaseException:
+                self.cpu += time.thread_time() - started
+                raise
+            self.cpu += time.thread_time() - started
+            try:
+                value = yield future
+                error = None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:
+                value = None
+                error = e
+
+
+class HandlerTimings:
+    """Число вызовов, ошибок, полное и процессорное время по обработчикам"""
+
+    def __init__(self):
+        self._entries = {}  # имя -> [вызовы, ошибки, полное время, процессорное время, максимум полного]
+
+    def wrap(self, function, name=None):
+        name = name or function.__name__
+
+        async def timed(*args, **kwargs):
+            measured = _Measured(function(*args, **kwargs))
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = await measured
+                failed = False
+                return result
+            finally:
+                self.record(name, time.perf_counter() - started, measured.cpu, failed)
+
+        timed.__name__ = name
+        timed.__wrapped__ = function
+        return timed
+
+    def record(self, name, wall, cpu, failed=False):
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._entries[name] = [0, 0, 0.0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += failed
+        entry[2] += wall
+        entry[3] += cpu
+        entry[4] = max(entry[4], wall)
+        HANDLER_SECONDS.observe(wall, name, 'wall')
+        HANDLER_SECONDS.observe(cpu, name, 'cpu')
+
+    def summary(self) -> list:
+        """[(имя, вызовы, ошибки, среднее полное, среднее процессорное, максимум полного)] по убыванию полного времени"""
+        rows = [(name, calls, errors, wall / calls, cpu / calls, wall_max)
+                for name, (calls, errors, wall, cpu, wall_max) in self._entries.items()]
+        rows.sort(key=lambda row: row[1] * row[3], reverse=True)
+        return rows
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Сэмплирование стека одного потока (по умолчанию - вызвавшего start) из фонового потока"""
+
+    def __init__(self, directory=PROFILE_DIR, interval=PROFILE_INTERVAL, max_seconds=PROFILE_MAX_SECONDS):
+        self.directory = directory
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.last_path = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id=None):
+        if self.running:
+            return False
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, args=(thread_id or threading.get_ident(),),
+                                        name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return True
+
+    def _sample(self, thread_id):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+            if time.monotonic() > deadline:
+                logger.info(f"Профилирование остановлено по лимиту {self.max_seconds} с")
+                break
+        self._dump()
+
+    def _dump(self):
+        os.makedirs(self.directory, exist_ok=True)
+        moment = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        path = os.path.join(self.directory, f"profile-{moment}.folded")
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        self.last_path = path
+        logger.info(f"Профиль записан: {path} ({self.samples} сэмплов)")
+
+    def stop(self):
+        """Останавливает сэмплирование и возвращает путь к файлу профиля (None, если не запускалось)"""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.last_path
+
+
+class Profiling:
+    """Замер обработчиков бота и команда /profile [start|stop]"""
+
+    def __init__(self, bot, admins=PROFILE_ADMINS):
+        self.admins = admins
+        self.timings = HandlerTimings()
+        self.profiler = SamplingProfiler()
+        application = bot.application
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                handler.callback = self.timings.wrap(handler.callback)
+        bot.notify_admins_privately = self.timings.wrap(bot.notify_admins_privately)
+        # Отдельная группа: команда не зависит от обработчиков сообщений бота
+        application.add_handler(CommandHandler("profile", self.profile_command, filters=filters.UpdateType.MESSAGE), group=-1)
+
+    async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /profile: время обработчиков, запуск и остановка профилировщика"""
+        if update.effective_user is None or update.effective_user.id not in self.admins:
+            return
+        action = context.args[0].lower() if context.args else ''
+        lines = []
+        if action == 'start':
+            if self.profiler.start():
+                lines.append(f"Профилировщик запущен (интервал {self.profiler.interval * 1000:g} мс, "
+                             f"не дольше {self.profiler.max_seconds} с)")
+            else:
+                lines.append("Профилировщик уже запущен")
+        elif action == 'stop':
+            path = self.profiler.stop()
+            lines.append(f"Профиль: {path} ({self.profiler.samples} сэмплов)" if path else "Профилировщик не запускался")
+        else:
+            if self.profiler.running:
+                lines.append(f"Профилировщик: идет {time.time() - self.profiler.started_at:.0f} с, "
+                             f"{self.profiler.samples} сэмплов")
+            else:
+                lines.append("Профилировщик: выключен (/profile start, /profile stop)")
+            lines.append("")
+            lines.append("Обработчик: вызовы, ошибки, среднее полное / процессорное, максимум (мс)")
+            for name, calls, errors, wall, cpu, wall_max in self.timings.summary():
+                lines.append(f"{name}: {calls}, {errors}, {wall * 1000:.2f} / {cpu * 1000:.2f}, {wall_max * 1000:.1f}")
+        await update.effective_message.reply_text("\n".join(lines))
+
+    def close(self):
+        """Сохраняет профиль, если профилировщик работает при остановке бота"""
+        if self.profiler.running:
+            self.profiler.stop()
+
+
+def install_profiling(bot):
+    """Включает профилирование бота, если PROFILING=true; вызывается после setup_handlers. Возвращает Profiling или None"""
+    if not PROFILING:
+        return None
+    logger.info("Профилирование включено: замер обработчиков и команда /profile")
+    return Profiling(bot)
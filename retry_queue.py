@@ -0,0 +1,159 @@
+"""
+Очередь повторного удаления: сообщения, которые не удалось удалить из-за временной
+ошибки (сеть, 5xx, исчерпанный RetryAfter), сохраняются в SQLite и удаляются повторно
+с экспоненциальной задержкой и джиттером. Очередь переживает перезапуск бота.
+Итог каждого повтора (удалено или окончательная ошибка) передается в on_result бота.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from config import DELETE_RETRY_DB, DELETE_RETRY_BASE_DELAY, DELETE_RETRY_MAX_DELAY, DELETE_RETRY_MAX_AGE
+from outbound import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient(error) -> bool:
+    """Временная ошибка, после которой удаление имеет смысл повторить"""
+    # BadRequest (сообщение не найдено, слишком старое) - наследник NetworkError, но повтор не поможет
+    if isinstance(error, (BadRequest, Forbidden)):
+        return False
+    return isinstance(error, (NetworkError, RetryAfter))
+
+
+class DeletionRetryQueue:
+    def __init__(self, deleter, path=DELETE_RETRY_DB, base_delay=DELETE_RETRY_BASE_DELAY,
+                 max_delay=DELETE_RETRY_MAX_DELAY, max_age=DELETE_RETRY_MAX_AGE, on_result=None):
+        self.deleter = deleter
+        # on_result(chat_id, message_id, тип сообщения, удалено ли) - для статистики и журнала бота
+        self.on_result = on_result
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_age = max_age
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            " chat_id INTEGER NOT NULL, message_id INTEGER NOT NULL,"
+            " sent_at REAL NOT NULL, attempts INTEGER NOT NULL, due_at REAL NOT NULL, message_type TEXT,"
+            " PRIMARY KEY (chat_id, message_id))"
+        )
+        # Базы прежней версии - без типа сообщения
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+        if 'message_type' not in columns:
+            self._db.execute("ALTER TABLE pending ADD COLUMN message_type TEXT")
+        self._wakeup = None
+        self._task = None
+        self.retries = 0
+        self.recovered = 0
+        self.permanent_failures = 0
+
+    @property
+    def depth(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {'queue_depth': self.depth, 'retries': self.retries, 'recovered': self.recovered,
+                'permanent_failures': self.permanent_failures}
+
+    def _backoff(self, attempts, error=None) -> float:
+        """Экспоненциальная задержка с джиттером; пауза RetryAfter соблюдается как минимум"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempts)
+        delay = random.uniform(delay / 2, delay)
+        if isinstance(error, RetryAfter):
+            delay = max(delay, retry_after_seconds(error))
+        return delay
+
+    def add(self, chat_id, message_id, error, sent_at=None, message_type=None) -> bool:
+        """
+        Ставит сообщение в очередь, если ошибка временная. Возвращает False для постоянной
+        ошибки (повтор не нужен).
+        """
+        if not is_transient(error):
+            return False
+        now = time.time()
+        self._db.execute(
+            "INSERT OR IGNORE INTO pending (chat_id, message_id, sent_at, attempts, due_at, message_type) VALUES (?, ?, ?, 0, ?, ?)",
+            (chat_id, message_id, sent_at or now, now + self._backoff(0, error), message_type),
+        )
+        self.start()
+        return True
+
+    def start(self):
+        """Запускает обработку очереди (в том числе оставшейся после перезапуска)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._worker())
+        else:
+            self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            try:
+                await self._process_due()
+            except Exception as e:
+                # Ошибка базы или обработки результата не останавливает очередь: строки остаются
+                # в базе и будут повторены после паузы
+                logger.error(f"Ошибка очереди повторного удаления: {e}")
+                await asyncio.sleep(self.base_delay)
+
+    async def _process_due(self):
+        """Ждет ближайшего срока и повторяет удаления, срок которых наступил"""
+        row = self._db.execute("SELECT MIN(due_at) FROM pending").fetchone()
+        if row[0] is None:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+            return
+        wait = row[0] - time.time()
+        if wait > 0:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            return
+        due = self._db.execute(
+            "SELECT chat_id, message_id, sent_at, attempts, message_type FROM pending WHERE due_at <= ? ORDER BY due_at LIMIT 500",
+            (time.time(),),
+        ).fetchall()
+        # Повторы одного чата снова объединяются в deleteMessages
+        results = await asyncio.gather(*(self.deleter.delete(row[0], row[1]) for row in due), return_exceptions=True)
+        for (chat_id, message_id, sent_at, attempts, message_type), result in zip(due, results):
+            self._handle_result(chat_id, message_id, sent_at, attempts, result, message_type)
+
+    def _handle_result(self, chat_id, message_id, sent_at, attempts, result, message_type=None):
+        self.retries += 1
+        key = (chat_id, message_id)
+        if not isinstance(result, Exception):
+            self.recovered += 1
+            self._db.execute("DELETE FROM pending WHERE chat_id = ? AND message_id = ?", key)
+            logger.info(f"Сообщение {message_id} в чате {chat_id} удалено с попытки {attempts + 2}")
+            if self.on_result is not None:
+                self.on_result(chat_id, message_id, message_type, True)
+            return
+        now = time.time()
+        # Telegram не дает удалять сообщения старше 48 часов: дальше повторять бессмысленно
+        if not is_transient(result) or now - sent_at > self.max_age:
+            self.permanent_failures += 1
+            self._db.execute("DELETE FROM pending WHERE chat_id = ? AND message_id = ?", key)
+            logger.error(f"Не удалось удалить сообщение {message_id} в чате {chat_id} после {attempts + 2} попыток: {result}")
+            if self.on_result is not None:
+                self.on_result(chat_id, message_id, message_type, False)
+            return
+        self._db.execute("UPDATE pending SET attempts = ?, due_at = ? WHERE chat_id = ? AND message_id = ?",
+                         (attempts + 1, now + self._backoff(attempts + 1, result), chat_id, message_id))
+
+    async def close(self):
+        """Останавливает обработку; невыполненные повторы остаются в базе до следующего запуска"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._db.close()
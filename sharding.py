@@ -0,0 +1,297 @@
+"""
+Шардированный режим: один процесс-приемник webhook распределяет обновления по N рабочим
+процессам по chat_id (chat_id % N). Каждый рабочий процесс - отдельное приложение PTB с
+классификатором и удалением; обновления одного чата всегда попадают в один процесс и
+обрабатываются в порядке поступления.
+
+Приемник получает обновления только через webhook: без WEBHOOK_URL он не запускается
+(getUpdates для шардированного режима не поддерживается).
+
+Запуск: python sharding.py [--workers 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import struct
+import subprocess
+import sys
+import time
+
+from telegram import Bot, Update
+
+from classifier import MessageClassifier, POLICY_DEFAULT
+from config import (
+    BOT_TOKEN, PORT, SHARD_WORKERS, SHARD_START_TIMEOUT, OUTBOUND_GLOBAL_RATE, WEBHOOK_URL, WEBHOOK_PATH,
+    WEBHOOK_SECRET, WEBHOOK_PREFILTER,
+)
+from update_types import allowed_updates_for
+from webhook_server import WebhookServer, json_loads, secret_matches
+
+logger = logging.getLogger(__name__)
+
+# Кадр между процессами: длина (4 байта) + JSON обновления; пустой кадр - барьер
+_LENGTH = struct.Struct('!I')
+BARRIER = b''
+ACK = b'\x01'
+
+def update_chat_id(data) -> int:
+    """chat_id из сырого обновления (0, если чата нет - такие обновления идут в первый процесс)"""
+    for key, value in data.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        chat = value.get('chat')
+        if chat is None:
+            # callback_query: чат - у сообщения с кнопкой; иначе распределяем по пользователю
+            message = value.get('message')
+            chat = message.get('chat') if message else value.get('from') or value.get('user')
+        return chat.get('id', 0) if chat else 0
+    return 0
+
+
+def shard_for(chat_id, workers) -> int:
+    return chat_id % workers
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(_LENGTH.size)
+    return await reader.readexactly(_LENGTH.unpack(header)[0])
+
+
+def write_frame(writer, payload):
+    writer.write(_LENGTH.pack(len(payload)) + payload)
+
+
+class ShardIngress(WebhookServer):
+    """
+    Приемник webhook: вместо очереди своего приложения пересылает тело запроса рабочему
+    процессу шарда. Рабочие процессы запускаются worker_command + [номер, порт приемника] и при
+    подключении сообщают номер шарда и allowed_updates своих обработчиков.
+    Упавший или не подключившийся за start_timeout процесс перезапускается; пока связи с шардом
+    нет, его обновления получают 503, и Telegram повторяет доставку.
+    """
+
+    def __init__(self, workers=SHARD_WORKERS, prefilter=None, worker_command=None,
+                 start_timeout=SHARD_START_TIMEOUT, **kwargs):
+        super().__init__(application=None, prefilter=prefilter, **kwargs)
+        self.workers = workers
+        self.worker_command = worker_command or [sys.executable, os.path.abspath(__file__), '--worker']
+        self.start_timeout = start_timeout
+        self._processes = [None] * workers
+        self._spawned_at = [0.0] * workers
+        self._writers = [None] * workers
+        self._readers = [None] * workers
+        self._connected = None
+        self._link_server = None
+        self._link_port = None
+        self._monitor = None
+        self.allowed_updates = None
+        self.routed = [0] * workers
+        self.restarts = 0
+        self.unavailable = 0
+
+    async def start_workers(self):
+        """Запускает рабочие процессы и ждет, пока все подключатся"""
+        self._connected = asyncio.Event()
+        self._link_server = await asyncio.start_server(self._accept_worker, '127.0.0.1', 0)
+        self._link_port = self._link_server.sockets[0].getsockname()[1]
+        for shard in range(self.workers):
+            self._spawn(shard)
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.start_timeout)
+        except asyncio.TimeoutError:
+            missing = [shard for shard, writer in enumerate(self._writers) if writer is None]
+            await self.stop()
+            raise RuntimeError(f"Рабочие процессы {missing} не подключились за {self.start_timeout:.0f} с")
+        self._monitor = asyncio.get_running_loop().create_task(self._supervise())
+        logger.info(f"Подключено рабочих процессов: {self.workers}")
+
+    def _spawn(self, shard):
+        env = dict(os.environ, SHARD_INDEX=str(shard),
+                   # Глобальный лимит Telegram делится между процессами
+                   OUTBOUND_GLOBAL_RATE=str(OUTBOUND_GLOBAL_RATE / self.workers))
+        self._processes[shard] = subprocess.Popen(self.worker_command + [str(shard), str(self._link_port)], env=env)
+        self._spawned_at[shard] = time.monotonic()
+
+    def _disconnect(self, shard):
+        writer = self._writers[shard]
+        self._writers[shard] = None
+        self._readers[shard] = None
+        if writer is not None:
+            writer.close()
+
+    async def _supervise(self, interval=1.0):
+        """Перезапускает завершившиеся рабочие процессы и те, что не подключились за start_timeout"""
+        while True:
+            await asyncio.sleep(interval)
+            for shard, process in enumerate(self._processes):
+                if process.poll() is None:
+                    if self._writers[shard] is None and time.monotonic() - self._spawned_at[shard] > self.start_timeout:
+                        logger.error(f"Рабочий процесс {shard} не подключился за {self.start_timeout:.0f} с")
+                        process.kill()
+                    continue
+                logger.error(f"Рабочий процесс {shard} завершился (код {process.returncode}), перезапуск")
+                self._disconnect(shard)
+                self.restarts += 1
+                self._spawn(shard)
+
+    async def _accept_worker(self, reader, writer):
+        shard, _, allowed_updates = (await reader.readline()).decode().strip().partition(' ')
+        shard = int(shard)
+        if allowed_updates:
+            self.allowed_updates = allowed_updates.split(',')
+        self._readers[shard] = reader
+        self._writers[shard] = writer
+        if all(self._writers):
+            self._connected.set()
+
+    async def route(self, body, data):
+        """Пересылает обновление процессу его чата"""
+        shard = shard_for(update_chat_id(data), self.workers)
+        writer = self._writers[shard]
+        # Конец потока от рабочего процесса - он завершился, даже если запись еще не вернула ошибку
+        if writer is None or writer.is_closing() or self._readers[shard].at_eof():
+            self._disconnect(shard)
+            raise ConnectionError(f"нет связи с рабочим процессом {shard}")
+        write_frame(writer, body)
+        self.routed[shard] += 1
+        try:
+            await writer.drain()
+        except ConnectionError:
+            self._disconnect(shard)
+            raise
+
+    async def barrier(self):
+        """Ждет, пока все рабочие процессы обработают полученные обновления"""
+        for writer in self._writers:
+            write_frame(writer, BARRIER)
+            await writer.drain()
+        for reader in self._readers:
+            await reader.readexactly(len(ACK))
+
+    async def handle_webhook(self, headers, body):
+        if not secret_matches(headers, self.secret):
+            return 401, {'error': 'unauthorized'}
+        try:
+            data = json_loads(body)
+            if self.prefilter is not None and not self.prefilter(data):
+                self.filtered += 1
+                return 200, b''
+            await self.route(body, data)
+        except (ValueError, TypeError, AttributeError):
+            return 400, {'error': 'invalid update'}
+        except ConnectionError as e:
+            # Рабочий процесс шарда перезапускается: Telegram повторит доставку
+            self.unavailable += 1
+            logger.warning(f"Обновление не передано: {e}")
+            return 503, {'error': 'shard unavailable'}
+        self.updates += 1
+        return 200, b''
+
+    def stats(self) -> dict:
+        return {'requests': self.requests, 'updates': self.updates, 'filtered': self.filtered,
+                'workers': self.workers, 'routed': self.routed, 'restarts': self.restarts,
+                'unavailable': self.unavailable}
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        await super().stop()
+        for shard in range(self.workers):
+            self._disconnect(shard)
+        if self._link_server is not None:
+            self._link_server.close()
+        processes = [process for process in self._processes if process is not None]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+async def run_worker(shard, link_port, application=None):
+    """Рабочий процесс: принимает обновления своего шарда и обрабатывает их приложением bot_web"""
+    from bot_web import SystemMessageCleanerBot
+
+    cleaner = SystemMessageCleanerBot(application)
+    application = cleaner.application
+    await application.initialize()
+    await cleaner.post_init(application)
+    await application.start()
+    reader, writer = await asyncio.open_connection('127.0.0.1', link_port)
+    # Приемник ставит webhook с allowed_updates обработчиков рабочего процесса
+    writer.write(f"{shard} {','.join(allowed_updates_for(application))}\n".encode())
+    await writer.drain()
+    logger.info(f"Рабочий процесс {shard} запущен (pid {os.getpid()})")
+    try:
+        while True:
+            payload = await read_frame(reader)
+            if payload == BARRIER:
+                await application.update_queue.join()
+                writer.write(ACK)
+                await writer.drain()
+                continue
+            await application.update_queue.put(Update.de_json(json_loads(payload), application.bot))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass  # Приемник остановлен
+    finally:
+        await application.stop()
+        await cleaner.post_stop(application)
+        await application.shutdown()
+
+
+async def run_ingress(workers, host='0.0.0.0', port=PORT):
+    """Приемник webhook с рабочими процессами; работает до SIGINT/SIGTERM"""
+    from bot_web import update_needed
+
+    # Приемнику нужны только id бота и классификатор для предфильтра: состояние, очереди и
+    # базы есть только у рабочих процессов
+    bot = Bot(BOT_TOKEN)
+    await bot.initialize()
+    classifier = MessageClassifier(POLICY_DEFAULT)
+    prefilter = (lambda data: update_needed(data, classifier, bot.id)) if WEBHOOK_PREFILTER else None
+    ingress = ShardIngress(workers, prefilter=prefilter)
+    await ingress.start_workers()
+    await ingress.start(host, port)
+    # Секрет (заданный или сгенерированный при запуске) передается Telegram вместе с адресом
+    await bot.set_webhook(WEBHOOK_URL + WEBHOOK_PATH, allowed_updates=ingress.allowed_updates,
+                          secret_token=WEBHOOK_SECRET)
+    logger.info(f"Режим webhook: {WEBHOOK_URL}{WEBHOOK_PATH}, рабочих процессов: {workers}, "
+                f"allowed_updates: {', '.join(ingress.allowed_updates or ())}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await ingress.stop()
+        await bot.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=SHARD_WORKERS)
+    parser.add_argument('--worker', nargs=2, type=int, metavar=('SHARD', 'LINK_PORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    if not args.worker and not WEBHOOK_URL:
+        # Без адреса webhook обновления не придут, а вручную установленный webhook не знает секрет
+        sys.exit("sharding.py работает только через webhook: задайте WEBHOOK_URL (и при необходимости WEBHOOK_SECRET)")
+    try:
+        if args.worker:
+            asyncio.run(run_worker(*args.worker))
+        else:
+            asyncio.run(run_ingress(args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Постоянный список администраторов, которым бот не может писать в личные сообщения
+(не нажимали /start или заблокировали бота). Изменения отмечаются в памяти, файл
+перезаписывается в фоне не чаще раза в flush_interval секунд и при остановке бота.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from telegram.error import Forbidden
+
+from config import UNREACHABLE_ADMINS_FILE, STATE_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class UnreachableAdmins:
+    def __init__(self, path=UNREACHABLE_ADMINS_FILE, flush_interval=STATE_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._ids = set()
+        self._dirty = False
+        self._task = None
+        self._lock = asyncio.Lock()
+        self.skipped = 0
+        self.saves = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._ids = set(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось загрузить список недоступных администраторов {self.path}: {e}")
+
+    def _save(self, ids):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(ids, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить список недоступных администраторов {self.path}: {e}")
+
+    def _changed(self):
+        """Отмечает изменение; запись в файл - в фоне через flush_interval секунд"""
+        self._dirty = True
+        if self._task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне цикла событий (консольные утилиты) пишем сразу
+            self._dirty = False
+            self._save(sorted(self._ids))
+            return
+        self._task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._task = None
+        await self.flush()
+
+    async def flush(self):
+        """Записывает список, если он изменился (файл пишется в отдельном потоке)"""
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self.saves += 1
+            await asyncio.to_thread(self._save, sorted(self._ids))
+
+    async def close(self):
+        """Отменяет отложенную запись и сохраняет последние изменения"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def __contains__(self, user_id):
+        return user_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def reachable(self, user_ids):
+        """Отбрасывает недоступных администраторов и учитывает пропущенные отправки"""
+        result = [user_id for user_id in user_ids if user_id not in self._ids]
+        self.skipped += len(user_ids) - len(result)
+        return result
+
+    def record(self, results):
+        """Запоминает администраторов, отправка которым завершилась 403 (результаты send_to_many)"""
+        added = False
+        for user_id, error in results:
+            if isinstance(error, Forbidden) and user_id not in self._ids:
+                logger.info(f"Администратор {user_id} недоступен для личных сообщений ({error}), уведомления отключены до /start")
+                self._ids.add(user_id)
+                added = True
+        if added:
+            self._changed()
+
+    def clear(self, user_id):
+        """Снимает пользователя из списка (он написал боту /start)"""
+        if user_id in self._ids:
+            self._ids.discard(user_id)
+            self._changed()
+            logger.info(f"Администратор {user_id} снова получает уведомления")
+
+    def stats(self) -> dict:
+        return {'unreachable': len(self._ids), 'skipped': self.skipped, 'saves': self.saves}
@@ -0,0 +1,98 @@
+"""
+Параллельная обработка обновлений разных чатов: обновления одного чата обрабатываются строго по
+очереди, обновления разных чатов - одновременно (не больше max_concurrent_updates сразу)
+"""
+
+import asyncio
+import inspect
+
+from telegram.ext import BaseUpdateProcessor
+
+
+def chat_key(update):
+    """Ключ очереди обновления: чат, иначе пользователь; None - порядок не важен"""
+    chat = getattr(update, 'effective_chat', None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, 'effective_user', None)
+    return user.id if user is not None else None
+
+
+class ChatOrderedProcessor(BaseUpdateProcessor):
+    """
+    Процессор обновлений PTB (Application.builder().concurrent_updates(...)). Обновление ждет
+    завершения предыдущего обновления своего чата и только потом занимает слот параллельности,
+    поэтому медленный чат не занимает слоты ожидающими обновлениями и не задерживает другие чаты.
+    """
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        # Последнее принятое обновление чата: событие выставляется, когда оно обработано
+        self._tails = {}
+        # Принятые и еще не завершенные обновления (ждущие и выполняющиеся)
+        self.pending = 0
+        self.waiting_chat = 0
+        self.active = 0
+        self.peak_active = 0
+        self.peak_queue_depth = 0
+        self.processed = 0
+        self.chat_waits = 0
+
+    async def process_update(self, update, coroutine):
+        key = chat_key(update)
+        previous = done = None
+        if key is not None:
+            previous = self._tails.get(key)
+            done = self._tails[key] = asyncio.Event()
+        self.pending += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.pending - self.active)
+        try:
+            if previous is not None:
+                self.chat_waits += 1
+                self.waiting_chat += 1
+                try:
+                    await previous.wait()
+                finally:
+                    self.waiting_chat -= 1
+            await super().process_update(update, coroutine)
+        finally:
+            self.pending -= 1
+            if inspect.getcoroutinestate(coroutine) == inspect.CORO_CREATED:
+                # Обработка отменена до запуска (остановка приложения)
+                coroutine.close()
+            if done is not None:
+                done.set()
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+
+    async def do_process_update(self, update, coroutine):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await coroutine
+        finally:
+            self.active -= 1
+            self.processed += 1
+
+    @property
+    def queue_depth(self):
+        """Обновления, принятые процессором, но еще не запущенные (ждут свой чат или свободный слот)"""
+        return self.pending - self.active
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            'max_concurrent': self.max_concurrent_updates,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'waiting_chat': self.waiting_chat,
+            'peak_active': self.peak_active,
+            'peak_queue_depth': self.peak_queue_depth,
+            'processed': self.processed,
+            'chat_waits': self.chat_waits,
+        }
@@ -0,0 +1,66 @@
+"""
+Вычисление минимального allowed_updates по зарегистрированным обработчикам
+"""
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ChatMemberHandler, CommandHandler, MessageHandler, filters
+
+# Типы обновлений, в которых PTB ищет effective_message для MessageFilter
+MESSAGE_UPDATE_TYPES = frozenset({
+    Update.MESSAGE, Update.EDITED_MESSAGE, Update.CHANNEL_POST, Update.EDITED_CHANNEL_POST,
+    Update.BUSINESS_MESSAGE, Update.EDITED_BUSINESS_MESSAGE,
+})
+
+_UPDATE_TYPE_FILTERS = {
+    filters.UpdateType.MESSAGE: {Update.MESSAGE},
+    filters.UpdateType.EDITED_MESSAGE: {Update.EDITED_MESSAGE},
+    filters.UpdateType.MESSAGES: {Update.MESSAGE, Update.EDITED_MESSAGE},
+    filters.UpdateType.CHANNEL_POST: {Update.CHANNEL_POST},
+    filters.UpdateType.EDITED_CHANNEL_POST: {Update.EDITED_CHANNEL_POST},
+    filters.UpdateType.CHANNEL_POSTS: {Update.CHANNEL_POST, Update.EDITED_CHANNEL_POST},
+    filters.UpdateType.EDITED: {Update.EDITED_MESSAGE, Update.EDITED_CHANNEL_POST, Update.EDITED_BUSINESS_MESSAGE},
+    filters.UpdateType.BUSINESS_MESSAGE: {Update.BUSINESS_MESSAGE},
+    filters.UpdateType.EDITED_BUSINESS_MESSAGE: {Update.EDITED_BUSINESS_MESSAGE},
+    filters.UpdateType.BUSINESS_MESSAGES: {Update.BUSINESS_MESSAGE, Update.EDITED_BUSINESS_MESSAGE},
+}
+
+
+def filter_update_types(message_filter) -> set:
+    """Возвращает типы обновлений, которые может пропустить фильтр (с запасом, если фильтр непрозрачен)"""
+    known = _UPDATE_TYPE_FILTERS.get(message_filter)
+    if known is not None:
+        return set(known)
+    base = getattr(message_filter, 'base_filter', None)
+    if base is not None:
+        and_filter = getattr(message_filter, 'and_filter', None)
+        if and_filter is not None and not isinstance(and_filter, bool):
+            return filter_update_types(base) & filter_update_types(and_filter)
+        other = getattr(message_filter, 'or_filter', None) or getattr(message_filter, 'xor_filter', None)
+        if other is not None:
+            return filter_update_types(base) | filter_update_types(other)
+    return set(MESSAGE_UPDATE_TYPES)
+
+
+def handler_update_types(handler) -> set:
+    """Возвращает типы обновлений, которые нужны обработчику"""
+    if isinstance(handler, (MessageHandler, CommandHandler)):
+        return filter_update_types(handler.filters)
+    if isinstance(handler, CallbackQueryHandler):
+        return {Update.CALLBACK_QUERY}
+    if isinstance(handler, ChatMemberHandler):
+        if handler.chat_member_types == ChatMemberHandler.MY_CHAT_MEMBER:
+            return {Update.MY_CHAT_MEMBER}
+        if handler.chat_member_types == ChatMemberHandler.CHAT_MEMBER:
+            return {Update.CHAT_MEMBER}
+        return {Update.MY_CHAT_MEMBER, Update.CHAT_MEMBER}
+    # Неизвестный обработчик - не рискуем потерять обновления
+    return set(Update.ALL_TYPES)
+
+
+def allowed_updates_for(application) -> list:
+    """Минимальный allowed_updates для обработчиков приложения (в порядке Update.ALL_TYPES)"""
+    needed = set()
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            needed |= handler_update_types(handler)
+    return [update_type for update_type in Update.ALL_TYPES if update_type in needed]
@@ -0,0 +1,180 @@
+"""
+Минимальный HTTP/1.1 сервер на asyncio для режима webhook: обновления Telegram, / и /health
+обслуживаются в том же цикле событий, что и приложение PTB (без отдельного потока Flask)
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import time
+
+from telegram import Update
+
+try:
+    # Быстрый разбор JSON (необязательная зависимость)
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+from http_pool import pool_stats
+from metrics import REGISTRY
+from config import WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 1 << 20
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+def secret_matches(headers, secret) -> bool:
+    """Заголовок секрета webhook совпадает с ожидаемым (сравнение за постоянное время)"""
+    return hmac.compare_digest(headers.get(SECRET_HEADER, '').encode(), secret.encode())
+
+
+class WebhookServer:
+    """
+    Принимает POST на path и кладет обновления в application.update_queue. Очередь ограничена
+    queue_size: при переполнении сервер отвечает 503, и Telegram повторит доставку позже.
+    inline_action(update) может вернуть вызов Bot API ({'method': ..., ...}), который Telegram
+    выполнит по ответу на webhook-запрос. prefilter(data) получает разобранный JSON обновления
+    и возвращает False, если объекты PTB для него строить не нужно (обновление отбрасывается).
+    """
+
+    def __init__(self, application, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET, queue_size=WEBHOOK_QUEUE_SIZE,
+                 inline_action=None, prefilter=None):
+        self.application = application
+        self.path = path
+        self.secret = secret
+        self.queue_size = queue_size
+        self.inline_action = inline_action
+        self.prefilter = prefilter
+        self._server = None
+        self.started_at = time.time()
+        self.requests = 0
+        self.updates = 0
+        self.rejected = 0
+        self.inline_calls = 0
+        self.filtered = 0
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        logger.info(f"HTTP сервер слушает {host}:{port}, webhook: {self.path}")
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1] if self._server else None
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'bad request line'}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': 'body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                self.requests += 1
+                status, payload = await self.handle(method, target.split('?', 1)[0], headers, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка HTTP соединения: {e}")
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        content_type = 'application/json'
+        if isinstance(payload, str):
+            # Текстовый формат Prometheus
+            body = payload.encode()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def handle(self, method, path, headers, body):
+        """Маршрутизация запроса; возвращает (статус, тело ответа)"""
+        if path == self.path:
+            if method != 'POST':
+                return 405, {'error': 'method not allowed'}
+            return await self.handle_webhook(headers, body)
+        if method != 'GET':
+            return 405, {'error': 'method not allowed'}
+        if path == '/':
+            return 200, {
+                "status": "running",
+                "bot": "Telegram System Message Cleaner",
+                "message": "Bot is running successfully!",
+            }
+        if path == '/metrics':
+            return 200, REGISTRY.render()
+        if path == '/health':
+            return 200, {"status": "healthy", "uptime": round(time.time() - self.started_at), **self.stats()}
+        return 404, {'error': 'not found'}
+
+    async def handle_webhook(self, headers, body):
+        """Проверяет секрет и ставит обновление в очередь приложения"""
+        if not secret_matches(headers, self.secret):
+            return 401, {'error': 'unauthorized'}
+        if self.queue_depth() >= self.queue_size:
+            self.rejected += 1
+            return 503, {'error': 'update queue is full'}
+        try:
+            data = json_loads(body)
+            if self.prefilter is not None and not self.prefilter(data):
+                self.filtered += 1
+                return 200, b''
+            update = Update.de_json(data, self.application.bot)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return 400, {'error': 'invalid update'}
+        self.updates += 1
+        inline = self.inline_action(update) if self.inline_action is not None else None
+        if inline is not None:
+            # Вызов выполнится по ответу: отдельный запрос к Bot API не нужен
+            self.inline_calls += 1
+        self.application.update_queue.put_nowait(update)
+        return 200, inline if inline is not None else b''
+
+    def queue_depth(self):
+        """Обновления, ждущие обработки: в очереди приложения и в процессоре обновлений"""
+        processor = self.application.update_processor
+        return self.application.update_queue.qsize() + getattr(processor, 'queue_depth', 0)
+
+    def stats(self) -> dict:
+        return {'requests': self.requests, 'updates': self.updates, 'rejected': self.rejected,
+                'inline_calls': self.inline_calls, 'filtered': self.filtered, 'update_queue': self.queue_depth(),
+                'http_pools': pool_stats(self.application)}
@@ -0,0 +1,114 @@
+"""
+Скользящие счетчики удалений за минуту, час и сутки: общие, по типам SYSTEM_MESSAGE_TYPES и по
+чатам. Каждый счетчик - кольцевые буферы в одном массиве (60 секунд, 60 минут, 24 часа) и
+поддерживаемые суммы окон, поэтому добавление и чтение - O(1), а память ограничена числом чатов.
+"""
+
+import time
+from array import array
+from collections import OrderedDict
+
+from audit_log import TYPES, TYPE_CODES
+from config import WINDOW_STATS_CHATS
+
+# Уровни: (число ячеек, ширина ячейки в секундах) - минута, час, сутки
+LEVELS = ((60, 1), (60, 60), (24, 3600))
+_OFFSETS = (0, 60, 120)
+_SLOTS = 144
+
+
+class RollingCounter:
+    __slots__ = ('_slots', '_sums', '_ticks')
+
+    def __init__(self, now=0.0):
+        self._slots = array('I', bytes(4 * _SLOTS))
+        self._sums = [0, 0, 0]
+        self._ticks = [int(now // width) for _, width in LEVELS]
+
+    def _advance(self, level, tick):
+        """Обнуляет ячейки, время которых прошло, и вычитает их из суммы окна"""
+        last = self._ticks[level]
+        if tick <= last:
+            return
+        size = LEVELS[level][0]
+        offset = _OFFSETS[level]
+        if tick - last >= size:
+            self._slots[offset:offset + size] = array('I', bytes(4 * size))
+            self._sums[level] = 0
+        else:
+            for step in range(last + 1, tick + 1):
+                index = offset + step % size
+                self._sums[level] -= self._slots[index]
+                self._slots[index] = 0
+        self._ticks[level] = tick
+
+    def add(self, now, amount=1):
+        for level, (size, width) in enumerate(LEVELS):
+            tick = int(now // width)
+            self._advance(level, tick)
+            self._slots[_OFFSETS[level] + tick % size] += amount
+            self._sums[level] += amount
+
+    def totals(self, now) -> tuple:
+        """(за минуту, за час, за сутки)"""
+        for level, (_, width) in enumerate(LEVELS):
+            self._advance(level, int(now // width))
+        return tuple(self._sums)
+
+
+class DeletionWindows:
+    """
+    Счетчики удалений: общий, по типу (для всех типов заранее) и по чату и типу (создаются при
+    первом удалении типа в чате). В памяти не больше max_chats чатов, давно не встречавшиеся
+    вытесняются (LRU).
+    """
+
+    def __init__(self, max_chats=WINDOW_STATS_CHATS):
+        self.max_chats = max_chats
+        self.total = RollingCounter()
+        self.by_type = [RollingCounter() for _ in TYPES]
+        self._chats = OrderedDict()  # chat_id -> {код типа: RollingCounter}
+        self.evictions = 0
+
+    def add(self, chat_id, message_type, now=None):
+        now = now or time.time()
+        code = TYPE_CODES.get(message_type, 0)
+        self.total.add(now)
+        self.by_type[code].add(now)
+        counters = self._chats.get(chat_id)
+        if counters is None:
+            counters = self._chats[chat_id] = {}
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._chats.move_to_end(chat_id)
+        counter = counters.get(code)
+        if counter is None:
+            counter = counters[code] = RollingCounter(now)
+        counter.add(now)
+
+    def summary(self, chat_id=None, now=None) -> dict:
+        """
+        {'total': (минута, час, сутки), 'types': [(тип, (минута, час, сутки)), ...]} - типы с
+        удалениями за сутки, по убыванию. Для chat_id - только этот чат.
+        """
+        now = now or time.time()
+        if chat_id is None:
+            counters = enumerate(self.by_type)
+        else:
+            counters = self._chats.get(chat_id, {}).items()
+        types = []
+        for code, counter in counters:
+            totals = counter.totals(now)
+            if totals[2]:
+                types.append((TYPES[code], totals))
+        types.sort(key=lambda item: item[1][2], reverse=True)
+        if chat_id is None:
+            total = self.total.totals(now)
+        else:
+            total = tuple(sum(totals[level] for _, totals in types) for level in range(3))
+        return {'total': total, 'types': types}
+
+    def stats(self) -> dict:
+        return {'chats': len(self._chats), 'evictions': self.evictions}